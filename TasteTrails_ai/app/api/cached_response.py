@@ -0,0 +1,14 @@
+from typing import Any
+
+from fastapi import Response
+
+
+def cached_json_response(result: Any) -> Any:
+    """
+    Return a get_or_set(..., raw=True) result from a route: a cache hit is sent as the stored
+    JSON bytes, skipping the decode and FastAPI's re-encoding; a freshly fetched value is
+    serialized by FastAPI as before
+    """
+    if isinstance(result, bytes):
+        return Response(content=result, media_type="application/json")
+    return result
@@ -1,7 +1,11 @@
+import json
 import logging
+from typing import Any, AsyncIterator, Dict
 
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 
+from app.api.cached_response import cached_json_response
 from app.clients.claude_client import claude_client
 from app.clients.redis_client import get_redis_cache
 from app.services.claude_service import claude_service
@@ -12,6 +16,52 @@ logger = logging.getLogger(__name__)
 router = APIRouter()
 
 
+def sse_event(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def sse_response(events: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+async def stream_cached_options(cache_key: str, options: AsyncIterator[Dict[str, Any]], response: Dict[str, Any],
+                                ttl_seconds: int) -> AsyncIterator[str]:
+    """
+    Emit an `option` event per option, then a `done` event with the same payload the blocking endpoint returns.
+    Cache hits replay the stored options, misses store the aggregate once the stream completes.
+    """
+    redis_cache = await get_redis_cache()
+
+    cached_result = await redis_cache.get_cache(cache_key)
+    if cached_result:
+        for option in cached_result.get("options", []):
+            yield sse_event("option", option)
+        yield sse_event("done", cached_result)
+        return
+
+    try:
+        collected = []
+        async for option in options:
+            collected.append(option)
+            yield sse_event("option", option)
+
+        if not collected:
+            raise ValueError("Claude returned no options")
+
+    except Exception as e:
+        logger.error(f"Error while streaming options for {cache_key}: {str(e)}")
+        yield sse_event("error", {"success": False, "error": str(e)})
+        return
+
+    response = {**response, "options": collected}
+    await redis_cache.set_cache(cache_key, response, ttl_seconds=ttl_seconds)
+    yield sse_event("done", response)
+
+
 @router.get("/claude/test")
 async def test_claude():
     try:
@@ -40,11 +90,44 @@ async def claude_generate_options(request: dict):
 
         cache_key = redis_cache.generate_cache_key("claude_generate_options", request)
 
-        cached_result = await redis_cache.get_cache(cache_key)
-        if cached_result:
-            return cached_result
+        async def fetch():
+            claude_result = await claude_service.generate_activity(
+                request["user_preferences"],
+                request["city"],
+                request["coordinates"],
+                request["start_time"],
+                request["end_time"],
+                request["date"],
+                request.get("theme", "Cultural Discovery"),
+                request.get("existing_activities", [])
+            )
+
+            if not claude_result:
+                logger.error("Claude service returned empty result")
+                raise HTTPException(status_code=500, detail="Claude failed")
+
+            return {
+                "success": True,
+                "city": request["city"],
+                "options": claude_result["data"].get("options", []),
+            }
+
+        return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
+
+    except Exception as e:
+        logger.error(f"Error in claude_generate_options: {str(e)}")
+        logger.error(f"Request that caused error: {request}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/claude/generate-options/stream")
+async def claude_generate_options_stream(request: dict):
+    try:
+        redis_cache = await get_redis_cache()
+
+        # Shares its cache entries with /claude/generate-options
+        cache_key = redis_cache.generate_cache_key("claude_generate_options", request)
 
-        claude_result = await claude_service.generate_activity(
+        options = claude_service.stream_activity(
             request["user_preferences"],
             request["city"],
             request["coordinates"],
@@ -55,56 +138,69 @@ async def claude_generate_options(request: dict):
             request.get("existing_activities", [])
         )
 
-        if not claude_result:
-            logger.error("Claude service returned empty result")
-            raise HTTPException(status_code=500, detail="Claude failed")
+        return sse_response(stream_cached_options(
+            cache_key,
+            options,
+            {"success": True, "city": request["city"]},
+            ttl_seconds=3600
+        ))
 
-        response = {
-            "success": True,
-            "city": request["city"],
-            "options": claude_result["data"].get("options", []),
-        }
+    except Exception as e:
+        logger.error(f"Error in claude_generate_options_stream: {str(e)}")
+        logger.error(f"Request that caused error: {request}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.post("/claude/generate_options_today")
+async def claude_generate_options_today(request: dict):
+    try:
+        redis_cache = await get_redis_cache()
+
+        cache_key = redis_cache.generate_cache_key("claude_generate_options_today", request)
 
-        await redis_cache.set_cache(cache_key, response, ttl_seconds=3600)
+        async def fetch():
+            claude_result = await claude_service.generate_options_today(
+                request["user_preferences"],
+                request["itinerary_cities"],
+                request["today_date"],
+            )
 
-        return response
+            if not claude_result:
+                logger.error("Claude service returned empty result")
+                raise HTTPException(status_code=500, detail="Claude failed")
+
+            return {
+                "success": True,
+                "options": claude_result["data"].get("options", []),
+            }
+
+        return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600 * 24, raw=True))
 
     except Exception as e:
         logger.error(f"Error in claude_generate_options: {str(e)}")
         logger.error(f"Request that caused error: {request}")
         raise HTTPException(status_code=500, detail=str(e))
 
-@router.post("/claude/generate_options_today")
-async def claude_generate_options_today(request: dict):
+@router.post("/claude/generate_options_today/stream")
+async def claude_generate_options_today_stream(request: dict):
     try:
         redis_cache = await get_redis_cache()
 
         cache_key = redis_cache.generate_cache_key("claude_generate_options_today", request)
 
-        cached_result = await redis_cache.get_cache(cache_key)
-        if cached_result:
-            return cached_result
-
-        claude_result = await claude_service.generate_options_today(
+        options = claude_service.stream_options_today(
             request["user_preferences"],
             request["itinerary_cities"],
             request["today_date"],
         )
 
-        if not claude_result:
-            logger.error("Claude service returned empty result")
-            raise HTTPException(status_code=500, detail="Claude failed")
-
-        response = {
-            "success": True,
-            "options": claude_result["data"].get("options", []),
-        }
-
-        await redis_cache.set_cache(cache_key, response, ttl_seconds=3600 * 24)
-
-        return response
+        return sse_response(stream_cached_options(
+            cache_key,
+            options,
+            {"success": True},
+            ttl_seconds=3600 * 24
+        ))
 
     except Exception as e:
-        logger.error(f"Error in claude_generate_options: {str(e)}")
+        logger.error(f"Error in claude_generate_options_today_stream: {str(e)}")
         logger.error(f"Request that caused error: {request}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
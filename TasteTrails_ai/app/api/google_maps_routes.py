@@ -1,8 +1,10 @@
 from fastapi import HTTPException, APIRouter
 
+from app.api.cached_response import cached_json_response
 from app.clients.redis_client import get_redis_cache
 from app.models.google_maps_requests import VenueRequest, RoutesRequest, AddressRequest, WeatherRequest, \
-    AirQualityRequest, PollenQualityRequest
+    AirQualityRequest, PollenQualityRequest, RouteMatrixRequest, GeocodeBatchRequest
+from app.services.coordinate_grid import snap_for
 from app.services.google_maps_service import google_maps_service
 
 router = APIRouter()
@@ -14,22 +16,19 @@ async def search_venues_near_location(request: VenueRequest):
 
     cache_key = redis_cache.generate_cache_key("venues", request.model_dump())
 
-    cached_result = await redis_cache.get_cache(cache_key)
-    if cached_result:
-        return cached_result
+    async def fetch():
+        result = await google_maps_service.find_venues_near_location(
+            request.coordinates,
+            request.radius,
+            request.max_results
+        )
 
-    result = await google_maps_service.find_venues_near_location(
-        request.coordinates,
-        request.radius,
-        request.max_results
-    )
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["error"])
 
-    if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["error"])
+        return result
 
-    await redis_cache.set_cache(cache_key, result, ttl_seconds=3600)
-
-    return result
+    return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
 
 @router.post("/routes")
 async def calculate_route_between_addresses(request: RoutesRequest):
@@ -37,110 +36,131 @@ async def calculate_route_between_addresses(request: RoutesRequest):
 
     cache_key = redis_cache.generate_cache_key("routes", request.model_dump())
 
-    cached_result = await redis_cache.get_cache(cache_key)
+    async def fetch():
+        result = await google_maps_service.calculate_route_between_addresses(
+            request.start_address,
+            request.end_address,
+            request.travel_mode
+        )
 
-    if cached_result:
-        return cached_result
-    result = await google_maps_service.calculate_route_between_addresses(
-        request.start_address,
-        request.end_address,
-        request.travel_mode
-    )
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["error"])
 
-    if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["error"])
+        return result
 
-    await redis_cache.set_cache(cache_key, result, ttl_seconds=3600)
+    return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
+
+@router.post("/route-matrix")
+async def calculate_route_matrix(request: RouteMatrixRequest):
+    redis_cache = await get_redis_cache()
+
+    cache_key = redis_cache.generate_cache_key("route_matrix", request.model_dump())
+
+    async def fetch():
+        result = await google_maps_service.calculate_route_matrix(
+            request.origins,
+            request.destinations,
+            request.travel_mode
+        )
+
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["error"])
+
+        return result
+
+    return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
 
-    return result
 @router.post("/geocode-route")
 async def convert_address_to_coordinates(request: AddressRequest):
     redis_cache = await get_redis_cache()
 
     cache_key = redis_cache.generate_cache_key("geocode_route", request.model_dump())
 
-    cached_result = await redis_cache.get_cache(cache_key)
-    if cached_result:
-        return cached_result
+    async def fetch():
+        result = await google_maps_service.convert_address_in_coordinates(
+            request.address
+        )
+
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["error"])
+
+        return result
+
+    return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
 
-    result = await google_maps_service.convert_address_in_coordinates(
-        request.address
-    )
+@router.post("/geocode-batch")
+async def convert_addresses_to_coordinates(request: GeocodeBatchRequest):
+    # Each address is cached on its own, under the /geocode-route key
+    result = await google_maps_service.convert_addresses_in_coordinates(request.addresses)
 
     if not result["success"]:
         raise HTTPException(status_code=400, detail=result["error"])
 
-    await redis_cache.set_cache(cache_key, result, ttl_seconds=3600)
-
     return result
 
 @router.post("/weather-route")
 async def get_weather_forecast(request: WeatherRequest):
     redis_cache = await get_redis_cache()
 
+    request = request.model_copy(update={"coordinates": snap_for("weather_route", request.coordinates)})
+
     cache_key = redis_cache.generate_cache_key("weather_route", request.model_dump())
 
-    cached_result = await redis_cache.get_cache(cache_key)
-    if cached_result:
-        return cached_result
+    async def fetch():
+        result = await google_maps_service.get_weather_forecast_for_location(
+            request.coordinates,
+            request.days_ahead)
 
-    result = await google_maps_service.get_weather_forecast_for_location(
-        request.coordinates,
-        request.days_ahead)
+        if not result.get("success", False):
+            raise HTTPException(status_code=400, detail=result["error"])
 
-    if not result.get("success", False):
-        raise HTTPException(status_code=400, detail=result["error"])
+        return result
 
-    await redis_cache.set_cache(cache_key, result, ttl_seconds=3600)
-
-    return result
+    return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
 
 @router.post("/air-quality")
 async def get_air_quality(request: AirQualityRequest):
     redis_cache = await get_redis_cache()
 
-    cache_key = redis_cache.generate_cache_key("air_quality", request.model_dump())
+    request = request.model_copy(update={"coordinates": snap_for("air_quality", request.coordinates)})
 
-    cached_result = await redis_cache.get_cache(cache_key)
-    if cached_result:
-        return cached_result
+    cache_key = redis_cache.generate_cache_key("air_quality", request.model_dump())
 
-    result = await google_maps_service.get_hourly_air_quality_range_for_location(
-        request.coordinates,
-        request.start_hour,
-        request.end_hour,
-        request.target_date
-    )
+    async def fetch():
+        result = await google_maps_service.get_hourly_air_quality_range_for_location(
+            request.coordinates,
+            request.start_hour,
+            request.end_hour,
+            request.target_date
+        )
 
 
-    if not result.get("success", False):
-        raise HTTPException(status_code=400, detail=result["error"])
+        if not result.get("success", False):
+            raise HTTPException(status_code=400, detail=result["error"])
 
-    await redis_cache.set_cache(cache_key, result, ttl_seconds=3600)
+        return result
 
-    return result
+    return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
 @router.post("/pollen-forecast")
 async def get_pollen_forecast(request: PollenQualityRequest):
     redis_cache = await get_redis_cache()
 
-    cache_key = redis_cache.generate_cache_key("pollen_forecast", request.model_dump())
-
-    cached_result = await redis_cache.get_cache(cache_key)
-    if cached_result:
-        return cached_result
+    request = request.model_copy(update={"coordinates": snap_for("pollen_forecast", request.coordinates)})
 
+    cache_key = redis_cache.generate_cache_key("pollen_forecast", request.model_dump())
 
-    result = await google_maps_service.get_pollen_forecast_for_location(
-        request.coordinates,
-        str(request.target_date),
-    )
+    async def fetch():
+        result = await google_maps_service.get_pollen_forecast_for_location(
+            request.coordinates,
+            str(request.target_date),
+        )
 
-    if not result.get("success", False):
-        raise HTTPException(status_code=400, detail=result["error"])
+        if not result.get("success", False):
+            raise HTTPException(status_code=400, detail=result["error"])
 
-    await redis_cache.set_cache(cache_key, result, ttl_seconds=3600)
+        return result
 
-    return result
+    return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
 
 @router.post("/is-city")
 async def validate_if_location_is_city(request: AddressRequest):
@@ -148,17 +168,14 @@ async def validate_if_location_is_city(request: AddressRequest):
 
     cache_key = redis_cache.generate_cache_key("is_city", request.model_dump())
 
-    cached_result = await redis_cache.get_cache(cache_key)
-    if cached_result:
-        return cached_result
-
-    result = await google_maps_service.check_if_location_is_city(
-        request.address
-    )
+    async def fetch():
+        result = await google_maps_service.check_if_location_is_city(
+            request.address
+        )
 
-    if not result["success"]:
-        raise HTTPException(status_code=400, detail=result["error"])
+        if not result["success"]:
+            raise HTTPException(status_code=400, detail=result["error"])
 
-    await redis_cache.set_cache(cache_key, result, ttl_seconds=3600)
+        return result
 
-    return result
\ No newline at end of file
+    return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
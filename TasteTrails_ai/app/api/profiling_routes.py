@@ -0,0 +1,33 @@
+import secrets
+
+from fastapi import APIRouter, Depends, Header, HTTPException
+from fastapi.responses import FileResponse
+
+from app.clients.profiling import profile_store, PROFILING_ADMIN_TOKEN
+
+
+def require_admin_token(x_admin_token: str = Header("")):
+    # Never open without a token, even if the router gets mounted by mistake
+    if not PROFILING_ADMIN_TOKEN or not secrets.compare_digest(x_admin_token, PROFILING_ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+router = APIRouter(dependencies=[Depends(require_admin_token)])
+
+
+@router.get("/admin/profiles")
+async def list_profiles():
+    return {"profiles": profile_store.list()}
+
+
+@router.get("/admin/profiles/{profile_id}")
+async def download_profile(profile_id: str, format: str = "html"):
+    """The HTML report, or the pyinstrument session with format=session"""
+    extension = "pyisession" if format == "session" else "html"
+    path = profile_store.path(profile_id, extension)
+    if path is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if extension == "html":
+        return FileResponse(path, media_type="text/html")
+    return FileResponse(path, media_type="application/json", filename=path.name)
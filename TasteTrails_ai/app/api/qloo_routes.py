@@ -1,6 +1,7 @@
-from fastapi import HTTPException, APIRouter, Query
+from fastapi import HTTPException, APIRouter, Query, Response
 from fastapi.encoders import jsonable_encoder
 
+from app.api.cached_response import cached_json_response
 from app.clients.redis_client import get_redis_cache
 from app.models.city_recommendation import CityRecommendationsRequest
 from app.models.travel_recommendation import TravelRecommendationsRequest
@@ -23,15 +24,13 @@ async def get_entity_search(query: str = Query(..., min_length=1, description="S
             "entity_type": entity_type
         }
         cache_key = redis_cache.generate_cache_key("qloo_search", cache_data)
-        cached_result = await redis_cache.get_cache(cache_key)
-        if cached_result:
-            return cached_result
-
-        qloo_type= "urn:entity:" + entity_type
-        result = await qloo_service.search_entity(query, qloo_type, limit)
-        result_serializable = jsonable_encoder(result)
-        await redis_cache.set_cache(cache_key, result_serializable, ttl_seconds=3600)
-        return result
+
+        async def fetch():
+            qloo_type= "urn:entity:" + entity_type
+            result = await qloo_service.search_entity(query, qloo_type, limit)
+            return jsonable_encoder(result)
+
+        return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
     except HTTPException:
         raise
     except Exception as e:
@@ -46,38 +45,23 @@ async def get_recommendations(request: TravelRecommendationsRequest):
 
         cache_key = redis_cache.generate_cache_key("qloo_recommendations", request.model_dump())
 
-        cached_result = await redis_cache.get_cache(cache_key)
-        if cached_result:
-            return cached_result
-
-        preference_dict = {
-            "artists": request.user_preferences.artists,
-            "books": request.user_preferences.books,
-            "movies": request.user_preferences.movies,
-            "brands": request.user_preferences.brands,
-            "video_games": request.user_preferences.video_games,
-            "tv_shows": request.user_preferences.tv_shows,
-            "podcasts": request.user_preferences.podcasts,
-            "persons": request.user_preferences.persons,
-        }
+        async def fetch():
+            preference_dict = QlooService.preference_dict(request.user_preferences)
 
-        preference_dict = {k: v for k, v in preference_dict.items() if v}
+            if not preference_dict:
+                raise HTTPException(status_code=400, detail="No user preference provided!")
 
-        if not preference_dict:
-            raise HTTPException(status_code=400, detail="No user preference provided!")
+            result = await qloo_service.get_recommendations(preference_dict, request.limit)
 
-        result = await qloo_service.get_recommendations(preference_dict, request.limit)
+            if not result["success"]:
+                raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
 
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
-
-        response = {
-            "success": True,
-            "data": result,
-        }
+            return {
+                "success": True,
+                "data": result,
+            }
 
-        await redis_cache.set_cache(cache_key, response, ttl_seconds=3600)
-        return response
+        return cached_json_response(await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True))
 
     except HTTPException:
         raise
@@ -92,24 +76,25 @@ async def get_recommendation_cities(request: CityRecommendationsRequest):
 
         cache_key = redis_cache.generate_cache_key("qloo_recommendation_cities", request.model_dump())
 
-        cached_result = await redis_cache.get_cache(cache_key)
-        if cached_result:
-            return cached_result
+        async def fetch():
+            result = await qloo_service.get_city_recommendations(request.itinerary_cities, request.limit)
+
+            if not result["success"]:
+                raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
 
-        result = await qloo_service.get_city_recommendations(request.itinerary_cities, request.limit)
+            return result
 
-        if not result["success"]:
-            raise HTTPException(status_code=500, detail=result.get("error", "Unknown error"))
+        result = await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=3600, raw=True)
 
-        await redis_cache.set_cache(cache_key, result, ttl_seconds=3600)
+        if isinstance(result, bytes):
+            # Cache hit: the stored document is wrapped without being parsed
+            return Response(content=b'{"success":true,"data":' + result + b'}', media_type="application/json")
 
         return {
             "success": True,
             "data": result,
         }
 
-
-
     except HTTPException:
         raise
     except Exception as e:
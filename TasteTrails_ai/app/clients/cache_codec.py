@@ -0,0 +1,111 @@
+import json
+import logging
+import os
+import zlib
+from typing import Any, Dict, Optional
+
+try:
+    import orjson
+except ImportError:  # optional, the standard json module is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+CACHE_COMPRESSION_THRESHOLD = int(os.environ.get("CACHE_COMPRESSION_THRESHOLD", "1024"))
+CACHE_COMPRESSION_LEVEL = int(os.environ.get("CACHE_COMPRESSION_LEVEL", "6"))
+
+# First byte of every encoded value. Control characters never start a JSON document,
+# so values written before the codec existed (plain JSON text) are still recognised.
+FORMAT_JSON = b"\x01"
+FORMAT_JSON_ZLIB = b"\x02"
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        try:
+            return orjson.dumps(value)
+        except TypeError:
+            # e.g. non-string dict keys or integers beyond 64 bits
+            pass
+    return json.dumps(value, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class ValueCodec:
+    """
+    Serializes cache values as a format byte followed by JSON, zlib-compressed above a
+    size threshold, and records how many bytes the compression saves per key prefix
+    """
+
+    def __init__(self, compression_threshold: int = CACHE_COMPRESSION_THRESHOLD,
+                 compression_level: int = CACHE_COMPRESSION_LEVEL):
+        self.compression_threshold = compression_threshold
+        self.compression_level = compression_level
+        self.prefix_stats: Dict[str, Dict[str, int]] = {}
+
+    def encode(self, value: Any, prefix: Optional[str] = None) -> bytes:
+        payload = dumps(value)
+        encoded = FORMAT_JSON + payload
+
+        if len(payload) >= self.compression_threshold:
+            compressed = zlib.compress(payload, self.compression_level)
+            if len(compressed) < len(payload):
+                encoded = FORMAT_JSON_ZLIB + compressed
+
+        if prefix is not None:
+            self._record(prefix, len(payload), len(encoded))
+        return encoded
+
+    @staticmethod
+    def decode(data: bytes | str) -> Any:
+        if isinstance(data, str):
+            return json.loads(data)
+
+        header, payload = data[:1], data[1:]
+        if header == FORMAT_JSON:
+            return loads(payload)
+        if header == FORMAT_JSON_ZLIB:
+            return loads(zlib.decompress(payload))
+        # Legacy entry: plain JSON text without a format byte
+        return loads(data)
+
+    @staticmethod
+    def to_json(data: bytes | str) -> bytes:
+        """The JSON document of an encoded value, without parsing it"""
+        if isinstance(data, str):
+            return data.encode("utf-8")
+
+        header = data[:1]
+        if header == FORMAT_JSON:
+            return data[1:]
+        if header == FORMAT_JSON_ZLIB:
+            return zlib.decompress(data[1:])
+        return data
+
+    def _record(self, prefix: str, raw_size: int, stored_size: int) -> None:
+        stats = self.prefix_stats.setdefault(prefix, {
+            "writes": 0,
+            "compressed_writes": 0,
+            "raw_bytes": 0,
+            "stored_bytes": 0,
+        })
+        stats["writes"] += 1
+        stats["compressed_writes"] += stored_size < raw_size
+        stats["raw_bytes"] += raw_size
+        stats["stored_bytes"] += stored_size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "json": "orjson" if orjson is not None else "json",
+            "compression_threshold": self.compression_threshold,
+            "prefixes": {
+                prefix: {**stats, "bytes_saved": stats["raw_bytes"] - stats["stored_bytes"]}
+                for prefix, stats in self.prefix_stats.items()
+            },
+        }
+
+
+__all__ = ['ValueCodec', 'FORMAT_JSON', 'FORMAT_JSON_ZLIB']
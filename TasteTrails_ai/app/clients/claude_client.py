@@ -1,9 +1,14 @@
+import json
 import logging
 import os
-from typing import Dict, Any
+from typing import Dict, Any, AsyncIterator
 
 import httpx
 
+from app.clients.http_client import http_clients
+from app.clients.metrics import operation
+from app.clients.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 class ClaudeClient:
@@ -20,6 +25,7 @@ class ClaudeClient:
             "anthropic-version": "2023-06-01"
         }
 
+    @traced()
     async def generate(self,
                        prompt: str,
                        model: str = "claude-3-5-sonnet-20241022",
@@ -27,43 +33,45 @@ class ClaudeClient:
                        temperature: float = 0.7) -> Dict[str, Any]:
 
         try:
-            async with httpx.AsyncClient() as client:
-                payload = {
-                    "model": model,
-                    "max_tokens": max_tokens,
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": prompt
-                        }
-                    ],
-                    "temperature": temperature
-                }
-
-                response = await client.post(
-                    self.base_url,
-                    headers=self.headers,
-                    json=payload,
-                    timeout=45.0
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    content = data["content"][0]["text"]
-
-                    return {
-                        "success": True,
-                        "content": content
+            client = http_clients.get(self.base_url)
+
+            payload = {
+                "model": model,
+                "max_tokens": max_tokens,
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": prompt
                     }
+                ],
+                "temperature": temperature
+            }
+
+            response = await client.post(
+                self.base_url,
+                headers=self.headers,
+                json=payload,
+                timeout=45.0,
+                extensions=operation("claude_generate")
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                content = data["content"][0]["text"]
+
+                return {
+                    "success": True,
+                    "content": content
+                }
 
-                else:
-                    error_text = response.text
+            else:
+                error_text = response.text
 
-                    return {
-                        "success": False,
-                        "error": f"Claude API error: {response.status_code}",
-                        "details": error_text
-                    }
+                return {
+                    "success": False,
+                    "error": f"Claude API error: {response.status_code}",
+                    "details": error_text
+                }
 
         except httpx.TimeoutException:
             return {
@@ -79,6 +87,59 @@ class ClaudeClient:
                 "details": str(e)
             }
 
+    @traced()
+    async def stream(self,
+                     prompt: str,
+                     model: str = "claude-3-5-sonnet-20241022",
+                     max_tokens: int = 2500,
+                     temperature: float = 0.7) -> AsyncIterator[str]:
+        """
+        Stream the generated text through the Messages streaming API, yielding text deltas as they arrive.
+        Raises on API errors instead of returning an error dict.
+        """
+        client = http_clients.get(self.base_url)
+
+        payload = {
+            "model": model,
+            "max_tokens": max_tokens,
+            "messages": [
+                {
+                    "role": "user",
+                    "content": prompt
+                }
+            ],
+            "temperature": temperature,
+            "stream": True
+        }
+
+        async with client.stream(
+            "POST",
+            self.base_url,
+            headers=self.headers,
+            json=payload,
+            timeout=45.0,
+            extensions=operation("claude_stream")
+        ) as response:
+            if response.status_code != 200:
+                error_text = (await response.aread()).decode("utf-8", errors="replace")
+                raise RuntimeError(f"Claude API error: {response.status_code} - {error_text}")
+
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+
+                event = json.loads(line[len("data:"):].strip())
+                event_type = event.get("type")
+
+                if event_type == "content_block_delta":
+                    delta = event.get("delta", {})
+                    if delta.get("type") == "text_delta":
+                        yield delta.get("text", "")
+                elif event_type == "error":
+                    raise RuntimeError(f"Claude API error: {event.get('error', {}).get('message', event)}")
+                elif event_type == "message_stop":
+                    break
+
 
 claude_client = ClaudeClient()
 
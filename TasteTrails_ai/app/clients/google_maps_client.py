@@ -4,6 +4,11 @@ from typing import Dict, Any, Optional, List
 
 import httpx
 
+from app.clients.hedging import hedgers
+from app.clients.http_client import http_clients
+from app.clients.metrics import operation
+from app.clients.tracing import traced
+
 logger = logging.getLogger(__name__)
 
 class GoogleMapsClient:
@@ -23,135 +28,156 @@ class GoogleMapsClient:
             "X-Goog-FieldMask": "routes.duration,routes.distanceMeters"
         }
 
-    async def get_hourly_air_quality_range(self, coordinates: str, start_datetime, end_datetime, target_date: str) -> Dict[str, Any]:
+        self.route_matrix_headers = {
+            "Content-Type": "application/json",
+            "X-Goog-Api-Key": self.api_key,
+            "X-Goog-FieldMask": "originIndex,destinationIndex,duration,distanceMeters,status,condition"
+        }
 
+    @traced()
+    async def fetch_hourly_air_quality(self, coordinates: str, start_datetime, end_datetime) -> List[Dict[str, Any]]:
+        """
+        Raw hourly forecasts between the two datetimes; raises on HTTP errors
+        """
         lat, lng = coordinates.strip().split(',')
-        try:
 
-            hours_in_range = int((end_datetime - start_datetime).total_seconds() / 3600)
+        hours_in_range = int((end_datetime - start_datetime).total_seconds() / 3600)
+
+        url = "https://airquality.googleapis.com/v1/forecast:lookup"
+
+        request_body = {
+            "location": {
+                "latitude": lat,
+                "longitude": lng
+            },
+            "period": {
+                "startTime": start_datetime.isoformat(),
+                "endTime": end_datetime.isoformat(),
+            },
+            "pageSize" : min(hours_in_range + 1, 96),
+            "extraComputations" : [
+                "HEALTH_RECOMMENDATIONS",
+                "DOMINANT_POLLUTANT_CONCENTRATION",
+                "POLLUTANT_ADDITIONAL_INFO"
+            ],
+            "languageCode": "en",
+            "universalAqi": True
+        }
 
-            url = "https://airquality.googleapis.com/v1/forecast:lookup"
+        client = http_clients.get(url)
 
-            request_body = {
-                "location": {
-                    "latitude": lat,
-                    "longitude": lng
-                },
-                "period": {
-                    "startTime": start_datetime.isoformat(),
-                    "endTime": end_datetime.isoformat(),
-                },
-                "pageSize" : min(hours_in_range + 1, 96),
-                "extraComputations" : [
-                    "HEALTH_RECOMMENDATIONS",
-                    "DOMINANT_POLLUTANT_CONCENTRATION",
-                    "POLLUTANT_ADDITIONAL_INFO"
-                ],
-                "languageCode": "en",
-                "universalAqi": True
-            }
+        response = await client.post(
+            url=url,
+            headers={
+                "Content-Type": "application/json",
+                "X-Goog-Api-Key": self.api_key,
+                "Accept-Language": "en"
+            },
+            json=request_body,
+            timeout=self.timeout,
+            extensions=operation("google_air_quality")
+        )
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+        response.raise_for_status()
 
-                response = await client.post(
-                    url=url,
-                    headers={
-                        "Content-Type": "application/json",
-                        "X-Goog-Api-Key": self.api_key,
-                        "Accept-Language": "en"
-                    },
-                    json=request_body
-                )
+        return response.json().get("hourlyForecasts", [])
 
-                response.raise_for_status()
+    @traced()
+    async def get_pollen_forecast_days(self, coordinates: str, days: int = 5) -> Dict[str, Any]:
+        """
+        Fetch the whole pollen horizon once and parse every day, indexed by offset from today
+        """
+        try:
+            data = await self._fetch_pollen_forecast(coordinates, days)
 
-                data = response.json()
+            parsed_days = [self._parse_pollen_data(data, offset) for offset in range(len(data.get("dailyInfo", [])))]
+            if not parsed_days:
+                return {"success": False, "error": "No pollen data available for this coordinates"}
 
-                return self._parse_air_quality_data(data, start_datetime, end_datetime)
+            return {"success": True, "days": parsed_days}
         except httpx.HTTPStatusError as e:
             return {"success": False, "error": f"API error: {e.response.status_code}"}
         except Exception as e:
             return {"success": False, "error": str(e)}
 
-    async def get_pollen_forecast(self, coordinates: str, days_offset: int) -> Dict[str, Any]:
-
-        try:
-            lat, lng = coordinates.strip().split(',')
-
-            url = "https://pollen.googleapis.com/v1/forecast:lookup"
+    async def _fetch_pollen_forecast(self, coordinates: str, days: int) -> Dict[str, Any]:
+        lat, lng = coordinates.strip().split(',')
 
-            params = {
-                "key": self.api_key,
-                "location.latitude": lat,
-                "location.longitude": lng,
-                "days": days_offset + 1,
-                "languageCode": "en",
-                "plantsDescription": "false"
-            }
+        url = "https://pollen.googleapis.com/v1/forecast:lookup"
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
+        params = {
+            "key": self.api_key,
+            "location.latitude": lat,
+            "location.longitude": lng,
+            "days": days,
+            "languageCode": "en",
+            "plantsDescription": "false"
+        }
 
-                response = await client.get(
-                    url=url,
-                    params=params,
-                )
+        client = http_clients.get(url)
 
-                response.raise_for_status()
+        response = await hedgers.get("google_pollen_forecast").get(
+            client,
+            url=url,
+            params=params,
+            timeout=self.timeout,
+            extensions=operation("google_pollen_forecast")
+        )
 
-                data = response.json()
+        response.raise_for_status()
 
-                return self._parse_pollen_data(data, days_offset)
-        except httpx.HTTPStatusError as e:
-            return {"success": False, "error": f"API error: {e.response.status_code}"}
-        except Exception as e:
-            return {"success": False, "error": str(e)}
+        return response.json()
 
+    @traced()
     async def search_nearby_places(self, coordinates: str, radius: float = 10000.0, max_results: int = 20) -> List[Dict[str, Any]]:
         try:
             lat, lng = coordinates.strip().split(',')
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                url = "https://places.googleapis.com/v1/places:searchNearby"
+            url = "https://places.googleapis.com/v1/places:searchNearby"
+            client = http_clients.get(url)
 
-                request_body = {
-                    "locationRestriction": {
-                        "circle": {
-                            "center": {"latitude": lat, "longitude": lng},
-                            "radius": radius
-                        }
-                    },
-                    "includedTypes": [
-                        "museum", "art_gallery", "library", "book_store",
-                        "performing_arts_theater", "cultural_center",
-                        "tourist_attraction", "restaurant", "cafe"
-                    ],
-                    "maxResultCount": min(max_results, 20)
-                }
-                response = await client.post(
-                    url=url,
-                    headers=self.places_headers,
-                    json=request_body
-                )
-
-                if response.status_code == 200:
-                    data = response.json()
-                    places = []
-
-                    for place in data.get("places", []):
-                        places.append({
-                            "name": place.get("displayName",{}).get("text", "Unknown"),
-                            "address": place.get("formattedAddress", "Unknown"),
-                            "rating": place.get("rating", 0.0),
-                            "types": place.get("types", [])
-                        })
-                    return places
-                else:
-                    return []
+            request_body = {
+                "locationRestriction": {
+                    "circle": {
+                        "center": {"latitude": lat, "longitude": lng},
+                        "radius": radius
+                    }
+                },
+                "includedTypes": [
+                    "museum", "art_gallery", "library", "book_store",
+                    "performing_arts_theater", "cultural_center",
+                    "tourist_attraction", "restaurant", "cafe"
+                ],
+                "maxResultCount": min(max_results, 20)
+            }
+            response = await client.post(
+                url=url,
+                headers=self.places_headers,
+                json=request_body,
+                timeout=self.timeout,
+                extensions=operation("google_places_nearby")
+            )
+
+            if response.status_code == 200:
+                data = response.json()
+                places = []
+
+                for place in data.get("places", []):
+                    places.append({
+                        "name": place.get("displayName",{}).get("text", "Unknown"),
+                        "address": place.get("formattedAddress", "Unknown"),
+                        "rating": place.get("rating", 0.0),
+                        "types": place.get("types", [])
+                    })
+                return places
+            else:
+                return []
         except Exception as e:
             return []
         except httpx.HTTPStatusError as e:
             return []
 
+    @traced()
     async def calculate_route(self, start_address: str, end_address: str, travel_mode: str = "WALK") -> Dict[str, Any]:
 
         valid_modes = ["WALK", "DRIVE", "BICYCLE", "TRANSIT"]
@@ -170,35 +196,36 @@ class GoogleMapsClient:
                 "units": "METRIC"
             }
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                response = await client.post(url=url, headers=self.routes_headers, json=request_body)
+            client = http_clients.get(url)
+            response = await client.post(url=url, headers=self.routes_headers, json=request_body, timeout=self.timeout,
+                                         extensions=operation("google_compute_routes"))
 
-                response.raise_for_status()
+            response.raise_for_status()
 
-                data = response.json()
+            data = response.json()
 
-                if not data.get("routes", []):
-                    return {
-                        "success": False,
-                        "error": "No route found between the specified addresses"
-                    }
+            if not data.get("routes", []):
+                return {
+                    "success": False,
+                    "error": "No route found between the specified addresses"
+                }
 
-                route = data["routes"][0]
+            route = data["routes"][0]
 
-                duration_info = int(route.get("duration").rstrip('s'))
-                distance_info = int(route.get("distanceMeters"))
+            duration_info = int(route.get("duration").rstrip('s'))
+            distance_info = int(route.get("distanceMeters"))
 
-                duration_minutes = duration_info // 60
-                distance_km = distance_info / 1000
+            duration_minutes = duration_info // 60
+            distance_km = distance_info / 1000
 
-                return {
-                    "success": True,
-                    "start_address": start_address,
-                    "end_address": end_address,
-                    "travel_mode": travel_mode,
-                    "duration_minutes": duration_minutes,
-                    "distance_km": round(distance_km, 2)
-                }
+            return {
+                "success": True,
+                "start_address": start_address,
+                "end_address": end_address,
+                "travel_mode": travel_mode,
+                "duration_minutes": duration_minutes,
+                "distance_km": round(distance_km, 2)
+            }
 
         except httpx.HTTPStatusError as e:
             return {"success": False, "error": e}
@@ -210,87 +237,122 @@ class GoogleMapsClient:
             }
 
 
+    @traced()
+    async def compute_route_matrix(self, origins: List[str], destinations: List[str],
+                                   travel_mode: str = "WALK") -> List[Dict[str, Any]]:
+        """
+        Raw computeRouteMatrix elements for every origin/destination pair; raises on HTTP errors.
+        Callers keep each call within the upstream element limits.
+        """
+        url = "https://routes.googleapis.com/distanceMatrix/v2:computeRouteMatrix"
+        request_body = {
+            "origins": [{"waypoint": {"address": origin}} for origin in origins],
+            "destinations": [{"waypoint": {"address": destination}} for destination in destinations],
+            "travelMode": travel_mode,
+            "units": "METRIC"
+        }
+
+        client = http_clients.get(url)
+        response = await client.post(url=url, headers=self.route_matrix_headers, json=request_body, timeout=self.timeout,
+                                     extensions=operation("google_route_matrix"))
+
+        response.raise_for_status()
+
+        return response.json()
+
+    @traced()
     async def geocode_address(self, address: str) -> Optional[Dict[str, Any]]:
         try:
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                url = "https://maps.googleapis.com/maps/api/geocode/json"
+            url = "https://maps.googleapis.com/maps/api/geocode/json"
+            client = http_clients.get(url)
 
-                params = {
-                    "address": address,
-                    "key": self.api_key
-                }
+            params = {
+                "address": address,
+                "key": self.api_key
+            }
 
-                response = await client.get(url=url, params=params, timeout=20.0)
+            response = await client.get(url=url, params=params, timeout=20.0, extensions=operation("google_geocode"))
 
-                response.raise_for_status()
+            response.raise_for_status()
 
-                data = response.json()
+            data = response.json()
 
-                results = data.get("results", [])
+            results = data.get("results", [])
 
-                if not results:
-                    return None
+            if not results:
+                return None
 
-                result = results[0]
-                location = result["geometry"]["location"]
-                geometry = result["geometry"]
+            result = results[0]
+            location = result["geometry"]["location"]
+            geometry = result["geometry"]
 
-                bounds = {
-                    "northeast": {
-                        "lat": geometry["bounds"]["northeast"]["lat"],
-                        "lng": geometry["bounds"]["northeast"]["lng"]
-                    },
-                    "southwest": {
-                        "lat": geometry["bounds"]["southwest"]["lat"],
-                        "lng": geometry["bounds"]["southwest"]["lng"]
-                    }
+            bounds = {
+                "northeast": {
+                    "lat": geometry["bounds"]["northeast"]["lat"],
+                    "lng": geometry["bounds"]["northeast"]["lng"]
+                },
+                "southwest": {
+                    "lat": geometry["bounds"]["southwest"]["lat"],
+                    "lng": geometry["bounds"]["southwest"]["lng"]
                 }
+            }
 
-                return {
-                    "success": True,
-                    "coordinates": f"{location['lat']},{location['lng']}",
-                    "types": result.get("types", []),
-                    "latitude": location['lat'],
-                    "bounds": bounds,
-                    "longitude": location['lng']
-                }
+            return {
+                "success": True,
+                "coordinates": f"{location['lat']},{location['lng']}",
+                "types": result.get("types", []),
+                "latitude": location['lat'],
+                "bounds": bounds,
+                "longitude": location['lng']
+            }
         except httpx.HTTPStatusError as e:
             return None
         except Exception as e:
             return None
 
-    async def get_weather_forecast(self, coordinates: str, days_ahead: int) -> Dict[str, Any]:
-
-        if days_ahead < 0 or days_ahead > 9:
-            return {"success": False,
-                    "error": "days_ahead must be between 0 and 9"}
-
+    @traced()
+    async def get_weather_forecast_days(self, coordinates: str, days: int = 10) -> Dict[str, Any]:
+        """
+        Fetch the whole weather horizon once and parse every day, indexed by offset from today
+        """
         try:
+            data = await self._fetch_weather_forecast(coordinates, days)
 
-            lat, lng = coordinates.strip().split(',')
+            parsed_days = [self._parse_weather_data_for_day(data, offset)
+                           for offset in range(len(data.get("forecastDays", [])))]
+            if not parsed_days:
+                return {"success": False, "error": "No forecast days found"}
+
+            return {"success": True, "days": parsed_days}
+        except httpx.HTTPStatusError as e:
+            return {"success": False, "error": f"API error: {e.response.status_code}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
 
-            async with httpx.AsyncClient(timeout=self.timeout) as client:
-                url = "https://weather.googleapis.com/v1/forecast/days:lookup"
+    async def _fetch_weather_forecast(self, coordinates: str, days: int) -> Dict[str, Any]:
+        lat, lng = coordinates.strip().split(',')
 
-                params = {
-                    "key": self.api_key,
-                    "location.latitude": lat,
-                    "location.longitude": lng,
-                    "days": max(days_ahead + 1, 1)
-                }
+        url = "https://weather.googleapis.com/v1/forecast/days:lookup"
+        client = http_clients.get(url)
 
-                response = await client.get(
-                    url=url,
-                    params=params
-                )
-                response.raise_for_status()
-                data = response.json()
-                return self._parse_weather_data_for_day(data, days_ahead)
+        params = {
+            "key": self.api_key,
+            "location.latitude": lat,
+            "location.longitude": lng,
+            "days": days,
+            # The API pages at 5 days by default
+            "pageSize": days
+        }
 
-        except httpx.HTTPStatusError as e:
-            return {"success": False, "error": e}
-        except Exception as e:
-            return {"success": False, "error": e}
+        response = await hedgers.get("google_weather_forecast").get(
+            client,
+            url=url,
+            params=params,
+            timeout=self.timeout,
+            extensions=operation("google_weather_forecast")
+        )
+        response.raise_for_status()
+        return response.json()
 
     def _parse_pollen_data(self, data: Dict, days_from_today: int) -> Dict[str, Any]:
         try:
@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+HEDGING_ENABLED = os.environ.get("HEDGING_ENABLED", "false").lower() == "true"
+# Send the second attempt once the first has taken longer than this percentile of recent latencies
+HEDGE_PERCENTILE = float(os.environ.get("HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_DELAY = float(os.environ.get("HEDGE_MIN_DELAY", "0.05"))
+HEDGE_MIN_SAMPLES = int(os.environ.get("HEDGE_MIN_SAMPLES", "20"))
+HEDGE_SAMPLES = int(os.environ.get("HEDGE_SAMPLES", "200"))
+# Hedges allowed per request, so hedging adds at most this fraction of upstream load
+HEDGE_MAX_RATIO = float(os.environ.get("HEDGE_MAX_RATIO", "0.1"))
+HEDGE_MAX_BURST = float(os.environ.get("HEDGE_MAX_BURST", "5"))
+
+
+class Hedger:
+    """
+    Hedged idempotent GETs for one operation: if the first attempt is slower than the recent
+    latency percentile a second identical request is sent, the first answer wins and the other is cancelled
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.latencies: Deque[float] = deque(maxlen=HEDGE_SAMPLES)
+        # Every request earns HEDGE_MAX_RATIO of a hedge, each hedge spends one
+        self.budget = 0.0
+        self.requests = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.budget_exhausted = 0
+
+    def delay(self) -> Optional[float]:
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return None
+        latencies = sorted(self.latencies)
+        index = min(len(latencies) - 1, int(HEDGE_PERCENTILE * len(latencies)))
+        return max(HEDGE_MIN_DELAY, latencies[index])
+
+    async def _attempt(self, client: httpx.AsyncClient, url: str, kwargs: Dict[str, Any]) -> httpx.Response:
+        started = time.monotonic()
+        try:
+            response = await client.get(url, **kwargs)
+        except asyncio.CancelledError:
+            # The losing attempt took at least this long, leaving it out would pull the percentile low
+            self.latencies.append(time.monotonic() - started)
+            raise
+        self.latencies.append(time.monotonic() - started)
+        return response
+
+    async def get(self, client: httpx.AsyncClient, url: str, **kwargs) -> httpx.Response:
+        if not HEDGING_ENABLED:
+            return await client.get(url, **kwargs)
+
+        self.requests += 1
+        self.budget = min(HEDGE_MAX_BURST, self.budget + HEDGE_MAX_RATIO)
+
+        delay = self.delay()
+        primary = asyncio.ensure_future(self._attempt(client, url, kwargs))
+        if delay is None:
+            return await primary
+
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=delay)
+            if done:
+                return primary.result()
+
+            if self.budget < 1:
+                self.budget_exhausted += 1
+                return await primary
+
+            self.budget -= 1
+            self.hedged += 1
+            hedge = asyncio.ensure_future(self._attempt(client, url, kwargs))
+            return await self._first_success(primary, hedge)
+        finally:
+            primary.cancel()
+
+    async def _first_success(self, primary: asyncio.Future, hedge: asyncio.Future) -> httpx.Response:
+        """First attempt to return a response; an attempt that raises leaves it to the other one"""
+        pending = {primary, hedge}
+        error: Optional[BaseException] = None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is hedge:
+                            self.hedge_wins += 1
+                        return attempt.result()
+                    error = attempt.exception()
+            raise error
+        finally:
+            for attempt in pending:
+                attempt.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        delay = self.delay()
+        return {
+            "enabled": HEDGING_ENABLED,
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "budget_exhausted": self.budget_exhausted,
+            "delay_ms": round(delay * 1000, 1) if delay is not None else None,
+        }
+
+
+class HedgerRegistry:
+    def __init__(self):
+        self.hedgers: Dict[str, Hedger] = {}
+
+    def get(self, name: str) -> Hedger:
+        hedger = self.hedgers.get(name)
+        if hedger is None:
+            hedger = Hedger(name)
+            self.hedgers[name] = hedger
+        return hedger
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {name: hedger.stats() for name, hedger in self.hedgers.items()}
+
+
+hedgers = HedgerRegistry()
+
+__all__ = ['Hedger', 'HedgerRegistry', 'hedgers', 'HEDGING_ENABLED']
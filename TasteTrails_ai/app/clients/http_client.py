@@ -0,0 +1,93 @@
+import importlib.util
+import logging
+import os
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from app.clients.metrics import MetricsTransport
+from app.clients.resilience import ResilientTransport, UpstreamRegistry, upstreams, RESILIENCE_ENABLED
+from app.clients.scheduler import ScheduledTransport, schedulers
+from app.clients.tracing import TracingTransport, TRACING_ENABLED
+
+logger = logging.getLogger(__name__)
+
+HTTP_MAX_CONNECTIONS = int(os.environ.get("HTTP_MAX_CONNECTIONS", "100"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.environ.get("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.environ.get("HTTP_KEEPALIVE_EXPIRY", "30.0"))
+HTTP_DEFAULT_TIMEOUT = float(os.environ.get("HTTP_DEFAULT_TIMEOUT", "30.0"))
+HTTP2_ENABLED = os.environ.get("HTTP2_ENABLED", "true").lower() == "true"
+
+
+class HttpClientRegistry:
+    """
+    Keeps one pooled keep-alive httpx.AsyncClient per upstream host so that
+    connections (and TLS sessions) are reused across calls
+    """
+
+    def __init__(self,
+                 upstream_registry: Optional[UpstreamRegistry] = None,
+                 transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.limits = httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        )
+        # HTTP/2 needs the optional `h2` package, fall back to HTTP/1.1 without it
+        self.http2 = HTTP2_ENABLED and importlib.util.find_spec("h2") is not None
+        self.clients: Dict[str, httpx.AsyncClient] = {}
+        self.upstreams = upstream_registry if upstream_registry is not None else upstreams
+        # Replaces the network transport for every host (benchmarks and local fakes)
+        self.transport = transport
+
+    @staticmethod
+    def host_key(url: str) -> str:
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def get(self, url: str) -> httpx.AsyncClient:
+        """
+        Return the shared client for the host of `url`, creating it on first use
+        """
+        key = self.host_key(url)
+        client = self.clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                transport=self._transport(),
+                timeout=HTTP_DEFAULT_TIMEOUT,
+            )
+            self.clients[key] = client
+            logger.info(f"Opened pooled HTTP client for {key} (http2={self.http2})")
+        return client
+
+    def _transport(self) -> httpx.AsyncBaseTransport:
+        """
+        The send path shared by every client: the pooled network transport, measured for /metrics,
+        behind the per-host rate scheduler, circuit breaker and concurrency limiter (only the scheduler
+        with RESILIENCE_ENABLED=false), and traced
+        """
+        transport = self.transport or httpx.AsyncHTTPTransport(limits=self.limits, http2=self.http2)
+        # Measured inside the resilience layer, so queueing and fast-fails are not counted as upstream latency
+        transport = MetricsTransport(transport)
+        if RESILIENCE_ENABLED:
+            transport = ResilientTransport(transport, self.upstreams)
+        else:
+            transport = ScheduledTransport(transport, schedulers)
+        if TRACING_ENABLED:
+            transport = TracingTransport(transport)
+        return transport
+
+    async def close(self) -> None:
+        clients = list(self.clients.items())
+        self.clients.clear()
+        for key, client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.error(f"Failed to close HTTP client for {key}: {e}")
+
+
+http_clients = HttpClientRegistry()
+
+__all__ = ['HttpClientRegistry', 'http_clients']
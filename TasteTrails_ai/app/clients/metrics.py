@@ -0,0 +1,161 @@
+import time
+from typing import Any, Dict
+
+import httpx
+from prometheus_client import Counter, Histogram
+
+# Upstream calls run from tens of milliseconds (Google, Qloo) to tens of seconds (Claude)
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 45.0, 60.0)
+SIZE_BUCKETS = (128, 512, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+UNKNOWN_OPERATION = "unknown"
+
+upstream_latency = Histogram(
+    "tastetrails_upstream_request_seconds",
+    "Time from sending an upstream request to its response headers",
+    ["upstream", "operation"],
+    buckets=LATENCY_BUCKETS,
+)
+upstream_responses = Counter(
+    "tastetrails_upstream_responses_total",
+    "Upstream responses by status code, or by error type when no response arrived",
+    ["upstream", "operation", "status"],
+)
+upstream_queue_wait = Histogram(
+    "tastetrails_upstream_queue_seconds",
+    "Time an upstream call waited in the rate scheduler for a token, apart from upstream latency",
+    ["upstream", "priority"],
+    buckets=LATENCY_BUCKETS,
+)
+upstream_rejections = Counter(
+    "tastetrails_upstream_rejections_total",
+    "Upstream calls refused before being sent, by the circuit breaker or the concurrency limiter",
+    ["upstream", "reason"],
+)
+
+cache_hits = Counter(
+    "tastetrails_cache_hits_total",
+    "Cache lookups answered from the local cache (l1) or Redis",
+    ["prefix", "tier"],
+)
+cache_misses = Counter(
+    "tastetrails_cache_misses_total",
+    "Cache lookups found in neither tier",
+    ["prefix"],
+)
+cache_sets = Counter(
+    "tastetrails_cache_sets_total",
+    "Values written to Redis",
+    ["prefix"],
+)
+cache_value_bytes = Histogram(
+    "tastetrails_cache_value_bytes",
+    "Encoded size of values written to Redis",
+    ["prefix"],
+    buckets=SIZE_BUCKETS,
+)
+
+route_latency = Histogram(
+    "tastetrails_http_request_seconds",
+    "Time to handle an API request, up to its response headers",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+
+def operation(name: str) -> Dict[str, Any]:
+    """Request extensions naming the client operation a call is measured under"""
+    return {"operation": name}
+
+
+def cache_prefix(key: str) -> str:
+    return key.split(":", 1)[0]
+
+
+def record_queue_wait(host: str, priority: str, wait: float) -> None:
+    upstream_queue_wait.labels(host, priority).observe(wait)
+
+
+def record_rejection(host: str, reason: str) -> None:
+    upstream_rejections.labels(host, reason).inc()
+
+
+def record_cache_hit(key: str, tier: str) -> None:
+    cache_hits.labels(cache_prefix(key), tier).inc()
+
+
+def record_cache_miss(key: str) -> None:
+    cache_misses.labels(cache_prefix(key)).inc()
+
+
+def record_cache_set(key: str, size: int) -> None:
+    prefix = cache_prefix(key)
+    cache_sets.labels(prefix).inc()
+    cache_value_bytes.labels(prefix).observe(size)
+
+
+class RouteMetricsMiddleware:
+    """
+    ASGI middleware timing every API request by its route template, so path parameters
+    and unknown paths do not create new series
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        observed = False
+
+        def observe(status: str) -> None:
+            nonlocal observed
+            observed = True
+            route = getattr(scope.get("route"), "path", "unmatched")
+            route_latency.labels(scope["method"], route, status).observe(time.perf_counter() - started)
+
+        async def send_and_time(message):
+            if message["type"] == "http.response.start":
+                observe(str(message["status"]))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_time)
+        finally:
+            if not observed:
+                observe("500")
+
+
+class MetricsTransport(httpx.AsyncBaseTransport):
+    """
+    Innermost layer of the pooled clients' send path, right around the network transport, so the
+    measured latency is the upstream's own: scheduler waits and breaker or limiter rejections are
+    reported by their own series
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        labels = (request.url.host, request.extensions.get("operation", UNKNOWN_OPERATION))
+        started = time.perf_counter()
+        try:
+            response = await self.transport.handle_async_request(request)
+        except Exception as e:
+            upstream_responses.labels(*labels, type(e).__name__).inc()
+            raise
+        finally:
+            upstream_latency.labels(*labels).observe(time.perf_counter() - started)
+
+        upstream_responses.labels(*labels, str(response.status_code)).inc()
+        return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+__all__ = ['MetricsTransport', 'RouteMetricsMiddleware', 'operation', 'record_queue_wait', 'record_rejection',
+           'record_cache_hit', 'record_cache_miss', 'record_cache_set']
@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import re
+import secrets
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+try:
+    from pyinstrument import Profiler
+except ImportError:  # optional, profiling stays off without it
+    Profiler = None
+
+logger = logging.getLogger(__name__)
+
+PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "false").lower() == "true"
+# A request is profiled when it carries this header with the admin token, or by sampling
+PROFILING_HEADER = os.environ.get("PROFILING_HEADER", "X-Profile").lower()
+PROFILING_SAMPLE_RATE = float(os.environ.get("PROFILING_SAMPLE_RATE", "0.0"))
+PROFILING_INTERVAL = float(os.environ.get("PROFILING_INTERVAL", "0.001"))
+PROFILING_DIR = os.environ.get("PROFILING_DIR", "profiles")
+PROFILING_MAX_PROFILES = int(os.environ.get("PROFILING_MAX_PROFILES", "50"))
+# Required for the profiling header and the admin endpoints (as X-Admin-Token): without it neither is
+# available, since the service is reachable from the internet through the proxy
+PROFILING_ADMIN_TOKEN = os.environ.get("PROFILING_ADMIN_TOKEN", "")
+
+PROFILE_ID = re.compile(r"^[0-9a-f]{32}$")
+
+
+class ProfileStore:
+    """
+    Keeps the latest profiles on disk: a rendered HTML report, the pyinstrument session
+    (open with `pyinstrument --load`) and a small JSON summary per profile
+    """
+
+    def __init__(self, directory: str = PROFILING_DIR, max_profiles: int = PROFILING_MAX_PROFILES):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+
+    def path(self, profile_id: str, extension: str) -> Optional[Path]:
+        if not PROFILE_ID.match(profile_id):
+            return None
+        path = self.directory / f"{profile_id}.{extension}"
+        return path if path.exists() else None
+
+    def save(self, profiler: "Profiler", summary: Dict[str, Any]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = summary["id"]
+        profiler.last_session.save(str(self.directory / f"{profile_id}.pyisession"))
+        (self.directory / f"{profile_id}.html").write_text(profiler.output_html(), encoding="utf-8")
+        # Summary last: a profile is listed once all of its files exist
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(summary), encoding="utf-8")
+        self.prune()
+
+    def prune(self) -> None:
+        summaries = sorted(self.directory.glob("*.json"), key=lambda path: path.stat().st_mtime, reverse=True)
+        for summary in summaries[self.max_profiles:]:
+            for extension in ("json", "html", "pyisession"):
+                (self.directory / f"{summary.stem}.{extension}").unlink(missing_ok=True)
+
+    def list(self) -> List[Dict[str, Any]]:
+        if not self.directory.exists():
+            return []
+        profiles = []
+        for path in self.directory.glob("*.json"):
+            try:
+                profiles.append(json.loads(path.read_text(encoding="utf-8")))
+            except (OSError, ValueError):
+                continue
+        return sorted(profiles, key=lambda profile: profile["started_at"], reverse=True)
+
+
+profile_store = ProfileStore()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware profiling single requests with pyinstrument (async-aware, so time spent
+    awaiting upstreams is attributed to the awaiting frame) and storing the result
+    """
+
+    def __init__(self, app, store: ProfileStore = profile_store):
+        self.app = app
+        self.store = store
+
+    def should_profile(self, scope) -> bool:
+        if PROFILING_ADMIN_TOKEN:
+            for key, value in scope["headers"]:
+                if key.decode("latin-1") == PROFILING_HEADER:
+                    return secrets.compare_digest(value.decode("latin-1"), PROFILING_ADMIN_TOKEN)
+        return PROFILING_SAMPLE_RATE > 0 and random.random() < PROFILING_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/admin/profiles") or not self.should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_and_record(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        profiler = Profiler(interval=PROFILING_INTERVAL, async_mode="enabled")
+        started_at = time.time()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_and_record)
+        finally:
+            session = profiler.stop()
+            summary = {
+                "id": uuid.uuid4().hex,
+                "method": scope["method"],
+                "path": scope["path"],
+                "route": getattr(scope.get("route"), "path", None),
+                "status": status,
+                "started_at": started_at,
+                "wall_seconds": round(session.duration, 4),
+                # CPU time of the whole process while the request ran, other requests included
+                "process_cpu_seconds": round(session.cpu_time, 4),
+            }
+            try:
+                # Rendering and writing happen off the event loop
+                await asyncio.to_thread(self.store.save, profiler, summary)
+            except Exception as e:
+                logger.error(f"Failed to store profile of {scope['path']}: {e}")
+
+
+PROFILING_AVAILABLE = PROFILING_ENABLED and Profiler is not None
+if PROFILING_ENABLED and Profiler is None:
+    logger.warning("PROFILING_ENABLED is set but pyinstrument is not installed, requests are not profiled")
+# The admin endpoints are only mounted when they can be protected
+PROFILING_ADMIN_ENABLED = PROFILING_AVAILABLE and bool(PROFILING_ADMIN_TOKEN)
+if PROFILING_AVAILABLE and not PROFILING_ADMIN_TOKEN:
+    logger.error("PROFILING_ENABLED is set without PROFILING_ADMIN_TOKEN: the profiling header is ignored, "
+                 "/admin/profiles is not mounted and only sampled requests are profiled")
+
+__all__ = ['ProfilingMiddleware', 'ProfileStore', 'profile_store', 'PROFILING_AVAILABLE', 'PROFILING_ADMIN_ENABLED',
+           'PROFILING_ADMIN_TOKEN']
@@ -1,14 +1,27 @@
+import asyncio
 import logging
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional
 from urllib.parse import urlencode
 
-import httpx
-
+from app.clients.hedging import hedgers
+from app.clients.http_client import http_clients
+from app.clients.metrics import operation
+from app.clients.redis_client import get_redis_cache, RedisCache
+from app.clients.tracing import traced
 from app.models.search_results import SearchResult
 
 logger = logging.getLogger(__name__)
 
+QLOO_MAX_CONCURRENCY = int(os.environ.get("QLOO_MAX_CONCURRENCY", "8"))
+QLOO_BATCH_RECOMMENDATIONS = os.environ.get("QLOO_BATCH_RECOMMENDATIONS", "true").lower() == "true"
+QLOO_BATCH_SIZE = int(os.environ.get("QLOO_BATCH_SIZE", "10"))
+QLOO_ENTITY_TTL = int(os.environ.get("QLOO_ENTITY_TTL", str(7 * 24 * 3600)))
+QLOO_SUGGESTION_TTL = int(os.environ.get("QLOO_SUGGESTION_TTL", str(24 * 3600)))
+
+# Shared by every QlooClient instance so the limit applies to the upstream as a whole
+qloo_semaphore = asyncio.Semaphore(QLOO_MAX_CONCURRENCY)
+
 
 class QlooClient:
     def __init__(self):
@@ -18,43 +31,52 @@ class QlooClient:
             "Accept": "application/json",
             "X-API-Key": self.api_key,
         }
+        self.semaphore = qloo_semaphore
+        self.batch_recommendations = QLOO_BATCH_RECOMMENDATIONS
+        self.batch_size = max(QLOO_BATCH_SIZE, 1)
+        self.entity_ttl = QLOO_ENTITY_TTL
+        self.suggestion_ttl = QLOO_SUGGESTION_TTL
 
 
+    @traced()
     async def search_entities(self, name: str, entity_type: str, limit: int) -> List[SearchResult]:
         """
         Search for entities
         """
         try:
-            async with (httpx.AsyncClient() as client):
-                url = f"{self.base_url}/search"
-                encoded_query = urlencode({"query": name, "take": str(limit)})
-                full_url = f"{url}?{encoded_query}&types={entity_type}"
-
-                response = await client.get(full_url, headers=self.headers)
-
-                if response.status_code == 200:
-                    data = response.json()
-                    results = data.get("results", [])
-                    logger.info(f"Full response: {data}")
-                    final_results = []
-                    if results:
-                        for result in results:
-                            entity_id=result.get("entity_id")
-                            name=result.get("name")
-
-                            partial = SearchResult(
-                                entityId=entity_id,
-                                name=name,
-                            )
-                            final_results.append(partial)
-
-                    return final_results
+            client = http_clients.get(self.base_url)
+            url = f"{self.base_url}/search"
+            encoded_query = urlencode({"query": name, "take": str(limit)})
+            full_url = f"{url}?{encoded_query}&types={entity_type}"
+
+            async with self.semaphore:
+                response = await hedgers.get("qloo_search").get(client, full_url, headers=self.headers,
+                                                                 extensions=operation("qloo_search"))
+
+            if response.status_code == 200:
+                data = response.json()
+                results = data.get("results", [])
+                logger.info(f"Full response: {data}")
+                final_results = []
+                if results:
+                    for result in results:
+                        entity_id=result.get("entity_id")
+                        name=result.get("name")
+
+                        partial = SearchResult(
+                            entityId=entity_id,
+                            name=name,
+                        )
+                        final_results.append(partial)
+
+                return final_results
 
         except Exception as e:
             logger.error(f"Search failed for '{name}': {e}")
 
         return []
 
+    @traced()
     async def get_recommendations(self,
                                   input_items: List[str],
                                   entity_type: str,
@@ -68,20 +90,13 @@ class QlooClient:
             limit: Max recommendations per input item
         """
         try:
-            all_recommendations = []
-
             if not entity_type.startswith("urn:entity:"):
                 entity_type = "urn:entity:" + entity_type
 
-            for input_item in input_items:
-                search_result = await self.search_entities(input_item, entity_type,2)
-                if search_result and len(search_result)> 0:
-                    entity_id=search_result[0].entityId
-                    if entity_id:
-                        suggestions = await self.get_suggestion(entity_id, entity_type, limit)
-                        all_recommendations.extend(suggestions)
-                    else:
-                        logger.warning(f"No entity found for: {input_item}")
+            if self.batch_recommendations:
+                all_recommendations = await self._get_batched_recommendations(input_items, entity_type, limit)
+            else:
+                all_recommendations = await self._get_per_item_recommendations(input_items, entity_type, limit)
 
             unique_recommendations = self.remove_duplicate_entities(all_recommendations, input_items)
 
@@ -98,38 +113,198 @@ class QlooClient:
                 "recommendations": []
             }
 
-    async def get_suggestion(self, entity_id: str, entity_type: str, limit: int) -> List[Dict[str, Any]]:
+    @staticmethod
+    def suggestion_cache_key(entity_ids: List[str], entity_type: str, limit: int) -> str:
+        return RedisCache.generate_cache_key("qloo_suggestion", {
+            "entity_ids": sorted(entity_ids),
+            "type": entity_type,
+            "limit": limit
+        })
+
+    @staticmethod
+    def entity_cache_key(input_item: str, entity_type: str) -> str:
+        return RedisCache.generate_cache_key("qloo_entity", {
+            "name": input_item.lower().strip(),
+            "type": entity_type
+        })
+
+    async def resolve_entity_id(self, input_item: str, entity_type: str) -> Optional[str]:
         """
-        Get suggestions for a specific entity
+        Resolve an item name to its Qloo entity id, cached by name and type
         """
-        try:
-            async with httpx.AsyncClient() as client:
-                url = f"{self.base_url}/recommendations"
-
-                params = {
-                    "entity_ids": [entity_id],
-                    "type": entity_type,
-                    "take": limit
-                }
-
-                response = await client.get(
-                    url=url,
-                    headers=self.headers,
-                    params=params,
-                    timeout=20.0
-                )
+        redis_cache = await get_redis_cache()
+        cache_key = self.entity_cache_key(input_item, entity_type)
+
+        async def fetch():
+            search_result = await self.search_entities(input_item, entity_type,2)
+            if search_result and len(search_result)> 0:
+                entity_id=search_result[0].entityId
+                if entity_id:
+                    return {"entity_id": entity_id}
+            logger.warning(f"No entity found for: {input_item}")
+            return {"entity_id": None}
+
+        resolved = await redis_cache.get_or_set(
+            cache_key,
+            fetch,
+            ttl_seconds=self.entity_ttl,
+            should_cache=lambda value: value["entity_id"] is not None
+        )
+        return resolved["entity_id"]
+
+    @traced()
+    async def resolve_entity_ids(self, input_items: List[str], entity_type: str) -> List[Any]:
+        """
+        Resolve several item names: ids already cached are read with one MGET, the rest are
+        searched concurrently. Like gather(return_exceptions=True), a failed search yields its exception.
+        """
+        redis_cache = await get_redis_cache()
+        cached = await redis_cache.get_many([self.entity_cache_key(item, entity_type) for item in input_items])
+
+        async def resolve(input_item: str):
+            entity = cached.get(self.entity_cache_key(input_item, entity_type))
+            if entity:
+                return entity["entity_id"]
+            return await self.resolve_entity_id(input_item, entity_type)
+
+        return await asyncio.gather(
+            *(resolve(input_item) for input_item in input_items),
+            return_exceptions=True
+        )
+
+    async def _cached_suggestions(self, entity_ids: List[str], entity_type: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Suggestions for one entity (or one batch of entities), cached by ids, type and limit.
+        Raises when the upstream call fails so that nothing is cached.
+        """
+        redis_cache = await get_redis_cache()
+        cache_key = self.suggestion_cache_key(entity_ids, entity_type, limit)
+
+        async def fetch():
+            recommendations = await self._fetch_suggestions(sorted(entity_ids), entity_type, limit * len(entity_ids))
+            return {"recommendations": recommendations}
+
+        cached = await redis_cache.get_or_set(cache_key, fetch, ttl_seconds=self.suggestion_ttl)
+        return cached["recommendations"]
+
+    async def _get_per_item_recommendations(self, input_items: List[str], entity_type: str,
+                                            limit: int) -> List[Dict[str, Any]]:
+        """
+        One search->suggestion chain per item, each suggestion call starting as soon as its own search resolves
+        """
+        async def recommend_for(input_item: str) -> List[Dict[str, Any]]:
+            entity_id = await self.resolve_entity_id(input_item, entity_type)
+            if entity_id:
+                return await self.get_suggestion(entity_id, entity_type, limit)
+            return []
+
+        item_results = await asyncio.gather(
+            *(recommend_for(input_item) for input_item in input_items),
+            return_exceptions=True
+        )
+
+        all_recommendations = []
+        for input_item, item_result in zip(input_items, item_results):
+            if isinstance(item_result, Exception):
+                logger.error(f"Recommendations failed for '{input_item}': {item_result}")
+                continue
+            all_recommendations.extend(item_result)
+        return all_recommendations
+
+    async def _get_batched_recommendations(self, input_items: List[str], entity_type: str,
+                                           limit: int) -> List[Dict[str, Any]]:
+        """
+        Resolve every item first, then ask for suggestions of all resolved entities in chunked requests
+        """
+        resolved = await self.resolve_entity_ids(input_items, entity_type)
 
-                if response.status_code == 200:
-                    return await self.process_response(response)
+        entity_ids = []
+        for input_item, entity_id in zip(input_items, resolved):
+            if isinstance(entity_id, Exception):
+                logger.error(f"Search failed for '{input_item}': {entity_id}")
+                continue
+            if entity_id and entity_id not in entity_ids:
+                entity_ids.append(entity_id)
+
+        # Entities already cached on their own (e.g. from another profile) skip the batch entirely.
+        # Batched results stay under their chunk key: a joint ranking says nothing about a single entity.
+        redis_cache = await get_redis_cache()
+        keys = [self.suggestion_cache_key([entity_id], entity_type, limit) for entity_id in entity_ids]
+        cached = await redis_cache.get_many(keys)
+
+        all_recommendations = []
+        missing_ids = []
+        for entity_id, key in zip(entity_ids, keys):
+            cached_suggestions = cached[key]
+            if cached_suggestions:
+                all_recommendations.extend(cached_suggestions["recommendations"])
+            else:
+                missing_ids.append(entity_id)
+
+        all_recommendations.extend(await self.get_batch_suggestions(missing_ids, entity_type, limit))
+        return all_recommendations
+
+    @traced()
+    async def get_batch_suggestions(self, entity_ids: List[str], entity_type: str,
+                                    limit: int) -> List[Dict[str, Any]]:
+        """
+        Get suggestions for several entities, packing up to batch_size entity ids in one request.
+        A failed chunk falls back to one request per entity.
+        """
+        chunks = [entity_ids[i:i + self.batch_size] for i in range(0, len(entity_ids), self.batch_size)]
+
+        async def suggest_for_chunk(chunk: List[str]) -> List[Dict[str, Any]]:
+            if len(chunk) == 1:
+                return await self.get_suggestion(chunk[0], entity_type, limit)
+            try:
+                return await self._cached_suggestions(chunk, entity_type, limit)
+            except Exception as err:
+                logger.warning(f"Batched recommendations failed for {len(chunk)} entities, "
+                               f"falling back to single requests: {str(err)}")
+                per_entity = await asyncio.gather(
+                    *(self.get_suggestion(entity_id, entity_type, limit) for entity_id in chunk)
+                )
+                return [item for suggestions in per_entity for item in suggestions]
 
-                else:
-                    logger.warning(f"Recommendations failed: {response.status_code} - {response.text}")
-                    return []
+        chunk_results = await asyncio.gather(*(suggest_for_chunk(chunk) for chunk in chunks))
+        return [item for suggestions in chunk_results for item in suggestions]
 
+    @traced()
+    async def get_suggestion(self, entity_id: str, entity_type: str, limit: int) -> List[Dict[str, Any]]:
+        """
+        Get suggestions for a specific entity
+        """
+        try:
+            return await self._cached_suggestions([entity_id], entity_type, limit)
         except Exception as err:
             logger.error(f"Exception getting suggestions: {str(err)}")
             return []
 
+    async def _fetch_suggestions(self, entity_ids: List[str], entity_type: str, take: int) -> List[Dict[str, Any]]:
+        client = http_clients.get(self.base_url)
+        url = f"{self.base_url}/recommendations"
+
+        params = {
+            "entity_ids": entity_ids,
+            "type": entity_type,
+            "take": take
+        }
+
+        async with self.semaphore:
+            response = await hedgers.get("qloo_recommendations").get(
+                client,
+                url=url,
+                headers=self.headers,
+                params=params,
+                timeout=20.0,
+                extensions=operation("qloo_recommendations")
+            )
+
+        if response.status_code == 200:
+            return await self.process_response(response)
+
+        raise RuntimeError(f"Recommendations failed: {response.status_code} - {response.text}")
+
     @staticmethod
     async def process_response(response):
         data = response.json()
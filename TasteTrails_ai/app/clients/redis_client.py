@@ -1,10 +1,21 @@
+import asyncio
 import hashlib
 import json
+import logging
 import os
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, Callable, Awaitable, Any, List
 
 import redis.asyncio as redis
 
+from app.clients.cache_codec import ValueCodec
+from app.clients.metrics import record_cache_hit, record_cache_miss, record_cache_set
+from app.clients.scheduler import run_with_priority, BACKGROUND
+from app.clients.tracing import traced, span_attributes
+
+logger = logging.getLogger(__name__)
+
 redis_client: redis.Redis | None = None
 
 async def get_redis() -> redis.Redis:
@@ -14,23 +25,412 @@ async def get_redis() -> redis.Redis:
             host=os.environ.get("REDIS_HOST"),
             port=int(os.environ.get("REDIS_PORT")),
             password=os.environ.get("REDIS_PASS"),
-            decode_responses=True,
+            # Values are binary (see ValueCodec)
+            decode_responses=False,
         )
     return redis_client
 
 
+def parse_prefix_settings(value: str) -> Dict[str, int]:
+    """Parse "prefix=seconds,prefix=seconds" settings from the environment"""
+    settings = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        prefix, seconds = item.split("=", 1)
+        settings[prefix.strip()] = int(seconds)
+    return settings
+
+
+CACHE_L1_ENABLED = os.environ.get("CACHE_L1_ENABLED", "true").lower() == "true"
+CACHE_L1_MAX_ENTRIES = int(os.environ.get("CACHE_L1_MAX_ENTRIES", "1024"))
+CACHE_L1_MAX_BYTES = int(os.environ.get("CACHE_L1_MAX_BYTES", str(32 * 1024 * 1024)))
+CACHE_L1_DEFAULT_TTL = int(os.environ.get("CACHE_L1_DEFAULT_TTL", "300"))
+CACHE_L1_TTL_CAPS = parse_prefix_settings(os.environ.get("CACHE_L1_TTL_CAPS", ""))
+
+# Stale-while-revalidate: a value is fresh for its soft TTL and kept in Redis until its hard TTL.
+# In between it is still served, while one background refresh per key replaces it.
+# Either TTL defaults to the ttl_seconds the caller passes; prefixes without hard > soft are not revalidated.
+CACHE_SOFT_TTLS = parse_prefix_settings(os.environ.get("CACHE_SOFT_TTLS", ""))
+CACHE_HARD_TTLS = parse_prefix_settings(os.environ.get(
+    "CACHE_HARD_TTLS",
+    "claude_generate_options=7200,claude_generate_options_today=172800,weather_route=7200"
+))
+
+
+# JSON documents of falsy values, which get_or_set treats as misses
+EMPTY_JSON = {b"{}", b"[]", b"null", b"false", b"0", b'""'}
+
+
+class LocalCache:
+    """
+    Bounded in-process LRU cache of encoded values, sized by entry count and bytes
+    """
+
+    def __init__(self,
+                 max_entries: int = CACHE_L1_MAX_ENTRIES,
+                 max_bytes: int = CACHE_L1_MAX_BYTES,
+                 default_ttl: int = CACHE_L1_DEFAULT_TTL,
+                 ttl_caps: Optional[Dict[str, int]] = None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.ttl_caps = ttl_caps if ttl_caps is not None else CACHE_L1_TTL_CAPS
+        self.entries: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def ttl_for(self, key: str, ttl_seconds: Optional[int] = None) -> int:
+        prefix = key.split(":", 1)[0]
+        cap = self.ttl_caps.get(prefix, self.default_ttl)
+        return cap if ttl_seconds is None else min(cap, ttl_seconds)
+
+    def get(self, key: str) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, serialized = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return serialized
+
+    def set(self, key: str, serialized: bytes, ttl_seconds: Optional[int] = None) -> None:
+        ttl = self.ttl_for(key, ttl_seconds)
+        size = len(serialized)
+        if ttl <= 0 or size > self.max_bytes:
+            self._remove(key)
+            return
+
+        self._remove(key)
+        self.entries[key] = (time.monotonic() + ttl, serialized)
+        self.bytes_used += size
+
+        while len(self.entries) > self.max_entries or self.bytes_used > self.max_bytes:
+            oldest_key = next(iter(self.entries))
+            self._remove(oldest_key)
+            self.evictions += 1
+
+    def _remove(self, key: str) -> None:
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= len(entry[1])
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.entries),
+            "bytes": self.bytes_used,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls for the same key into one in-flight task whose result
+    (or error) is shared by every caller
+    """
+
+    def __init__(self):
+        self.calls: Dict[str, asyncio.Task] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        # Shielded so a caller that goes away does not cancel the work the others wait on
+        return await asyncio.shield(self.start(key, fn))
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> asyncio.Task:
+        """Start `fn` for `key` unless a call is already in flight, and return the shared task"""
+        task = self.calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self.calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return task
+
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        if self.calls.get(key) is task:
+            del self.calls[key]
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self.calls)
+
+
 class RedisCache:
-    def __init__(self, redis_client: redis.Redis):
+    """
+    Two-tier cache: a per-process LocalCache (L1) in front of the shared Redis (L2)
+    """
+
+    def __init__(self,
+                 redis_client: redis.Redis,
+                 local_cache: Optional[LocalCache] = None,
+                 soft_ttls: Optional[Dict[str, int]] = None,
+                 hard_ttls: Optional[Dict[str, int]] = None,
+                 codec: Optional[ValueCodec] = None):
         self.redis = redis_client
+        self.codec = codec if codec is not None else ValueCodec()
+        self.local = local_cache if local_cache is not None else (LocalCache() if CACHE_L1_ENABLED else None)
+        self.single_flight = SingleFlight()
+        self.soft_ttls = soft_ttls if soft_ttls is not None else CACHE_SOFT_TTLS
+        self.hard_ttls = hard_ttls if hard_ttls is not None else CACHE_HARD_TTLS
+        self.stale_hits = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    def ttl_policy(self, key: str, ttl_seconds: int) -> Tuple[Optional[int], int]:
+        """
+        (soft, hard) TTLs for `key`; soft is None when the prefix is not revalidated in the
+        background, in which case the value simply expires after `hard` seconds
+        """
+        prefix = key.split(":", 1)[0]
+        soft = self.soft_ttls.get(prefix, ttl_seconds)
+        hard = self.hard_ttls.get(prefix, ttl_seconds)
+        return (soft, hard) if hard > soft else (None, hard)
 
+    def is_revalidated(self, key: str) -> bool:
+        """Whether `key` has a soft TTL, which only get_or_set checks"""
+        prefix = key.split(":", 1)[0]
+        return prefix in self.soft_ttls or prefix in self.hard_ttls
+
+    def _keep_local(self, key: str, serialized: bytes, remaining_ms: int) -> None:
+        # The L1 copy expires with the Redis entry, or earlier at the prefix cap (-1: Redis has no expiry).
+        # Revalidated keys could be stale already and are only copied to L1 by get_or_set.
+        if not self.local or self.is_revalidated(key) or remaining_ms == -2:
+            return
+        if remaining_ms == -1:
+            self.local.set(key, serialized)
+        elif remaining_ms >= 1000:
+            self.local.set(key, serialized, remaining_ms // 1000)
+
+    async def _lookup(self, key: str) -> Optional[bytes]:
+        """The encoded value for `key`: L1 first, then Redis"""
+        cached = self.local.get(key) if self.local else None
+        if cached is not None:
+            record_cache_hit(key, "l1")
+            return cached
+
+        # PTTL rides along in the same round trip so the L1 copy never outlives the Redis entry
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            cached, remaining_ms = await pipe.execute()
+
+        if cached:
+            record_cache_hit(key, "redis")
+            self._keep_local(key, cached, remaining_ms)
+        else:
+            record_cache_miss(key)
+        return cached
+
+    @traced()
     async def get_cache(self, key: str) -> Optional[dict]:
-        cached = await self.redis.get(key)
+        span_attributes({"cache.prefix": key.split(":", 1)[0]})
+        cached = await self._lookup(key)
         if cached:
-            return json.loads(cached)
+            return self.codec.decode(cached)
         return None
 
+    @traced()
+    async def get_many(self, keys: List[str]) -> Dict[str, Optional[dict]]:
+        """
+        Look up several keys at once: L1 first, then a single MGET (with the PTTLs) for the rest.
+        Every requested key is in the result, mapped to None on a miss.
+        """
+        span_attributes({"cache.keys": len(keys)})
+        values: Dict[str, Optional[bytes]] = {key: self.local.get(key) if self.local else None for key in keys}
+
+        remote_keys = [key for key, cached in values.items() if cached is None]
+        for key in values.keys() - remote_keys:
+            record_cache_hit(key, "l1")
+        if remote_keys:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.mget(remote_keys)
+                for key in remote_keys:
+                    pipe.pttl(key)
+                cached_values, *remaining = await pipe.execute()
+
+            for key, cached, remaining_ms in zip(remote_keys, cached_values, remaining):
+                values[key] = cached
+                if cached:
+                    record_cache_hit(key, "redis")
+                    self._keep_local(key, cached, remaining_ms)
+                else:
+                    record_cache_miss(key)
+
+        return {key: self.codec.decode(cached) if cached else None for key, cached in values.items()}
+
+    @traced()
     async def set_cache(self, key: str, value: dict, ttl_seconds: int = 1800) -> None:
-        await self.redis.set(key, json.dumps(value), ex=ttl_seconds)
+        soft, hard = self.ttl_policy(key, ttl_seconds)
+        serialized = self.codec.encode(value, prefix=key.split(":", 1)[0])
+        span_attributes({"cache.prefix": key.split(":", 1)[0], "cache.value_bytes": len(serialized)})
+        await self.redis.set(key, serialized, ex=hard)
+        record_cache_set(key, len(serialized))
+        if self.local:
+            # L1 only ever holds fresh values
+            self.local.set(key, serialized, soft if soft is not None else hard)
+
+    @traced()
+    async def set_many(self, values: Dict[str, Any], ttl_seconds: int = 1800,
+                       ttls: Optional[Dict[str, int]] = None) -> None:
+        """
+        Write several keys in one pipelined round trip; `ttls` overrides `ttl_seconds` per key
+        """
+        if not values:
+            return
+
+        span_attributes({"cache.keys": len(values)})
+        entries = []
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key, value in values.items():
+                soft, hard = self.ttl_policy(key, (ttls or {}).get(key, ttl_seconds))
+                serialized = self.codec.encode(value, prefix=key.split(":", 1)[0])
+                pipe.set(key, serialized, ex=hard)
+                entries.append((key, serialized, soft if soft is not None else hard))
+            await pipe.execute()
+
+        for key, serialized, local_ttl in entries:
+            record_cache_set(key, len(serialized))
+            if self.local:
+                self.local.set(key, serialized, local_ttl)
+
+    async def _lookup_revalidated(self, key: str, soft: int, hard: int) -> Tuple[Optional[bytes], bool]:
+        """The encoded value for `key` and whether it is past its soft TTL (GET and PTTL in one round trip)"""
+        cached = self.local.get(key) if self.local else None
+        if cached is not None:
+            record_cache_hit(key, "l1")
+            return cached, False
+
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(key)
+            pipe.pttl(key)
+            cached, remaining_ms = await pipe.execute()
+
+        if not cached:
+            record_cache_miss(key)
+            return None, False
+
+        record_cache_hit(key, "redis")
+        # Values are written with the hard TTL, so the age follows from what is left of it
+        fresh_ms = soft * 1000 - (hard * 1000 - remaining_ms) if remaining_ms >= 0 else soft * 1000
+        if fresh_ms > 0 and self.local:
+            self.local.set(key, cached, max(1, fresh_ms // 1000))
+        return cached, fresh_ms <= 0
+
+    def _refresh(self, key: str, load: Callable[[], Awaitable[Any]]) -> None:
+        """Reload a stale key in the background; a refresh or miss already in flight is reused"""
+        if key in self.single_flight.calls:
+            return
+
+        self.refreshes += 1
+        # Nobody waits on a refresh, so its upstream calls yield to interactive ones
+        task = self.single_flight.start(key, lambda: run_with_priority(BACKGROUND, load))
+
+        def report(done: asyncio.Task) -> None:
+            if not done.cancelled() and done.exception() is not None:
+                self.refresh_failures += 1
+                logger.warning(f"Background refresh of {key} failed: {done.exception()!r}")
+
+        task.add_done_callback(report)
+
+    @traced()
+    async def get_or_set(self,
+                         key: str,
+                         fetch: Callable[[], Awaitable[Any]],
+                         ttl_seconds: int = 1800,
+                         should_cache: Optional[Callable[[Any], bool]] = None,
+                         raw: bool = False) -> Any:
+        """
+        Return the cached value for `key`, or load it with `fetch` and cache it.
+        Concurrent misses for the same key share a single `fetch` call; errors raised
+        by `fetch` reach every waiting caller and nothing is cached.
+        Past the soft TTL of its prefix a value is still returned and refreshed in the background.
+        With `raw`, a hit is returned as the stored JSON bytes without being parsed
+        (see cached_json_response); a miss still returns the fetched value.
+        """
+        async def load():
+            value = await fetch()
+            if should_cache is None or should_cache(value):
+                await self.set_cache(key, value, ttl_seconds=ttl_seconds)
+            return value
+
+        span_attributes({"cache.prefix": key.split(":", 1)[0]})
+        soft, hard = self.ttl_policy(key, ttl_seconds)
+        if soft is None:
+            cached = await self._lookup(key)
+        else:
+            cached, stale = await self._lookup_revalidated(key, soft, hard)
+            if cached and stale:
+                self.stale_hits += 1
+                self._refresh(key, load)
+
+        if cached:
+            # Empty values count as misses, as they always have
+            if raw:
+                document = self.codec.to_json(cached)
+                if document not in EMPTY_JSON:
+                    return document
+            else:
+                value = self.codec.decode(cached)
+                if value:
+                    return value
+
+        return await self.single_flight.do(key, load)
+
+    @traced()
+    async def get_hash_fields(self, key: str, fields: List[str]) -> Dict[str, Optional[str]]:
+        """Read several text fields of a Redis hash in one round trip; missing fields map to None"""
+        if not fields:
+            return {}
+        values = await self.redis.hmget(key, fields)
+        for value in values:
+            # Counted per field, e.g. per stored hour of a location's day
+            if value is not None:
+                record_cache_hit(key, "redis")
+            else:
+                record_cache_miss(key)
+        return {field: value.decode("utf-8") if isinstance(value, bytes) else value
+                for field, value in zip(fields, values)}
+
+    @traced()
+    async def set_hash_fields(self, key: str, mapping: Dict[str, str], ttl_seconds: int = 1800) -> None:
+        """
+        Write several fields of a Redis hash. The TTL is set when the hash is created and is not
+        extended by later writes, so every field of the hash expires at the same time.
+        """
+        if not mapping:
+            return
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hset(key, mapping=mapping)
+            pipe.ttl(key)
+            _, ttl = await pipe.execute()
+        if ttl < 0:
+            await self.redis.expire(key, ttl_seconds)
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {
+            "l1": self.local.stats() if self.local else {},
+            "single_flight": {"in_flight": self.single_flight.in_flight()},
+            "codec": self.codec.stats(),
+            "stale_while_revalidate": {
+                "stale_hits": self.stale_hits,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+            },
+        }
 
     @staticmethod
     def generate_cache_key(prefix: str, data) -> str:
@@ -50,4 +450,4 @@ async def get_redis_cache() -> RedisCache:
     return redis_cache
 
 
-__all__ = ['RedisCache', 'redis_cache', 'get_redis_cache']
+__all__ = ['RedisCache', 'LocalCache', 'SingleFlight', 'redis_cache', 'get_redis_cache']
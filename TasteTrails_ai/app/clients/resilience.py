@@ -0,0 +1,343 @@
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import Dict, Any, Deque, Tuple, Optional
+
+import httpx
+
+from app.clients.metrics import record_rejection
+from app.clients.scheduler import parse_host_settings, schedulers
+
+logger = logging.getLogger(__name__)
+
+RESILIENCE_ENABLED = os.environ.get("RESILIENCE_ENABLED", "true").lower() == "true"
+
+# Circuit breaker: trips when, over the rolling window, the failure or slow-call rate reaches its threshold
+BREAKER_WINDOW_SECONDS = float(os.environ.get("BREAKER_WINDOW_SECONDS", "30"))
+BREAKER_MIN_CALLS = int(os.environ.get("BREAKER_MIN_CALLS", "10"))
+BREAKER_FAILURE_RATE = float(os.environ.get("BREAKER_FAILURE_RATE", "0.5"))
+BREAKER_SLOW_CALL_RATE = float(os.environ.get("BREAKER_SLOW_CALL_RATE", "0.8"))
+BREAKER_OPEN_SECONDS = float(os.environ.get("BREAKER_OPEN_SECONDS", "30"))
+BREAKER_HALF_OPEN_CALLS = int(os.environ.get("BREAKER_HALF_OPEN_CALLS", "1"))
+# Time to response headers above which a call counts as slow, per host ("host=seconds,...")
+BREAKER_SLOW_CALL_SECONDS = float(os.environ.get("BREAKER_SLOW_CALL_SECONDS", "10"))
+BREAKER_SLOW_CALL_OVERRIDES = parse_host_settings(
+    os.environ.get("BREAKER_SLOW_CALL_OVERRIDES", "api.anthropic.com=60")
+)
+
+# AIMD concurrency limit per host: +1/limit per healthy call, *backoff per overloaded one
+LIMIT_INITIAL = int(os.environ.get("LIMIT_INITIAL", "20"))
+LIMIT_MIN = int(os.environ.get("LIMIT_MIN", "2"))
+LIMIT_MAX = int(os.environ.get("LIMIT_MAX", "100"))
+LIMIT_BACKOFF = float(os.environ.get("LIMIT_BACKOFF", "0.9"))
+# A call is overloaded when its latency exceeds the host's baseline (median of recent successful calls)
+# by this factor. Per host overrides, 0 ignores latency: Claude response times follow the output length, not load.
+LIMIT_LATENCY_TOLERANCE = float(os.environ.get("LIMIT_LATENCY_TOLERANCE", "3.0"))
+LIMIT_LATENCY_TOLERANCE_OVERRIDES = parse_host_settings(
+    os.environ.get("LIMIT_LATENCY_TOLERANCE_OVERRIDES", "api.anthropic.com=0")
+)
+LIMIT_BASELINE_SAMPLES = int(os.environ.get("LIMIT_BASELINE_SAMPLES", "100"))
+LIMIT_BASELINE_MIN_SAMPLES = int(os.environ.get("LIMIT_BASELINE_MIN_SAMPLES", "10"))
+LIMIT_QUEUE_TIMEOUT = float(os.environ.get("LIMIT_QUEUE_TIMEOUT", "5.0"))
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Raised without calling the upstream while its breaker is open"""
+
+
+class ConcurrencyLimitExceeded(httpx.TransportError):
+    """Raised when no in-flight slot for the upstream frees up within the queue timeout"""
+
+
+def is_failure_status(status_code: int) -> bool:
+    # Client errors are the caller's fault and say nothing about upstream health
+    return status_code == 429 or status_code >= 500
+
+
+class CircuitBreaker:
+    """
+    closed -> open when the rolling failure or slow-call rate trips,
+    open -> half_open after BREAKER_OPEN_SECONDS, half_open -> closed on a successful probe
+    """
+
+    def __init__(self, slow_call_seconds: float):
+        self.slow_call_seconds = slow_call_seconds
+        self.state = "closed"
+        self.opened_at = 0.0
+        self.half_open_calls = 0
+        self.calls: Deque[Tuple[float, bool, bool]] = deque()
+        self.trips = 0
+        self.rejected = 0
+
+    def is_open(self) -> bool:
+        return self.state == "open" and time.monotonic() - self.opened_at < BREAKER_OPEN_SECONDS
+
+    def allow(self) -> bool:
+        if self.state == "open":
+            if self.is_open():
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+            self.half_open_calls = 0
+
+        if self.state == "half_open":
+            if self.half_open_calls >= BREAKER_HALF_OPEN_CALLS:
+                self.rejected += 1
+                return False
+            self.half_open_calls += 1
+
+        return True
+
+    def release_probe(self) -> None:
+        """Give back the slot of a half-open probe that ended without an outcome, e.g. cancelled"""
+        if self.state == "half_open" and self.half_open_calls > 0:
+            self.half_open_calls -= 1
+
+    def record(self, failed: bool, latency: float) -> None:
+        now = time.monotonic()
+        slow = latency >= self.slow_call_seconds
+
+        if self.state == "half_open":
+            if failed or slow:
+                self._open(now)
+            else:
+                self.state = "closed"
+                self.calls.clear()
+            return
+
+        self.calls.append((now, failed, slow))
+        while self.calls and self.calls[0][0] < now - BREAKER_WINDOW_SECONDS:
+            self.calls.popleft()
+
+        if self.state == "closed" and len(self.calls) >= BREAKER_MIN_CALLS:
+            failure_rate, slow_rate = self._rates()
+            if failure_rate >= BREAKER_FAILURE_RATE or slow_rate >= BREAKER_SLOW_CALL_RATE:
+                self._open(now)
+
+    def _open(self, now: float) -> None:
+        if self.state != "open":
+            self.trips += 1
+            logger.warning(f"Circuit opened after {len(self.calls)} calls (rates {self._rates()})")
+        self.state = "open"
+        self.opened_at = now
+        self.calls.clear()
+
+    def _rates(self) -> Tuple[float, float]:
+        if not self.calls:
+            return 0.0, 0.0
+        failures = sum(1 for _, failed, _ in self.calls if failed)
+        slow = sum(1 for _, _, slow in self.calls if slow)
+        return failures / len(self.calls), slow / len(self.calls)
+
+    def stats(self) -> Dict[str, Any]:
+        failure_rate, slow_rate = self._rates()
+        return {
+            "state": self.state,
+            "window_calls": len(self.calls),
+            "failure_rate": round(failure_rate, 3),
+            "slow_call_rate": round(slow_rate, 3),
+            "slow_call_seconds": self.slow_call_seconds,
+            "trips": self.trips,
+            "rejected": self.rejected,
+        }
+
+
+class AdaptiveLimiter:
+    """
+    AIMD limit on in-flight calls: grows by 1/limit per healthy call while the limit is in use
+    and shrinks by LIMIT_BACKOFF per failed call or call much slower than the baseline latency
+    """
+
+    def __init__(self, latency_tolerance: float = LIMIT_LATENCY_TOLERANCE):
+        self.latency_tolerance = latency_tolerance
+        self.limit = float(LIMIT_INITIAL)
+        self.in_flight = 0
+        self.baseline: Optional[float] = None
+        self.samples: Deque[float] = deque(maxlen=LIMIT_BASELINE_SAMPLES)
+        self.condition = asyncio.Condition()
+        self.rejected = 0
+
+    async def acquire(self) -> None:
+        async with self.condition:
+            try:
+                await asyncio.wait_for(
+                    self.condition.wait_for(lambda: self.in_flight < int(self.limit)),
+                    timeout=LIMIT_QUEUE_TIMEOUT
+                )
+            except asyncio.TimeoutError:
+                self.rejected += 1
+                raise
+            self.in_flight += 1
+
+    async def release(self) -> None:
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def record(self, failed: bool, latency: float) -> None:
+        # The baseline is the median of recent successful calls, so ordinary latency variance stays
+        # well under the tolerance while a sustained slowdown still stands out until the window catches up
+        if not failed:
+            self.samples.append(latency)
+            if len(self.samples) >= LIMIT_BASELINE_MIN_SAMPLES:
+                self.baseline = sorted(self.samples)[len(self.samples) // 2]
+
+        slow = bool(self.latency_tolerance) and self.baseline is not None \
+            and latency > self.baseline * self.latency_tolerance
+        overloaded = failed or slow
+        if overloaded:
+            self.limit = max(LIMIT_MIN, self.limit * LIMIT_BACKOFF)
+        elif self.in_flight >= self.limit / 2:
+            self.limit = min(LIMIT_MAX, self.limit + 1 / self.limit)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "latency_tolerance": self.latency_tolerance,
+            "in_flight": self.in_flight,
+            "baseline_latency_ms": round(self.baseline * 1000, 1) if self.baseline is not None else None,
+            "rejected": self.rejected,
+        }
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Response body that gives the in-flight slot back once it has been read or closed"""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release):
+        self.stream = stream
+        self.release = release
+
+    async def __aiter__(self):
+        async for chunk in self.stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self.stream.aclose()
+        finally:
+            await self.release()
+
+
+class Upstream:
+    """Rate scheduler, breaker and limiter guarding every call to one upstream host"""
+
+    def __init__(self, host: str):
+        self.host = host
+        self.scheduler = schedulers.get(host)
+        self.breaker = CircuitBreaker(BREAKER_SLOW_CALL_OVERRIDES.get(host, BREAKER_SLOW_CALL_SECONDS))
+        self.limiter = AdaptiveLimiter(LIMIT_LATENCY_TOLERANCE_OVERRIDES.get(host, LIMIT_LATENCY_TOLERANCE))
+
+    async def send(self, request: httpx.Request, transport: httpx.AsyncBaseTransport) -> httpx.Response:
+        # An open circuit fails fast instead of queueing for a rate token. The breaker is only asked
+        # once the token is in hand, so a half-open probe never holds its slot while queued.
+        if self.breaker.is_open():
+            self.breaker.rejected += 1
+            record_rejection(self.host, "circuit_open")
+            raise CircuitOpenError(f"Circuit open for {self.host}", request=request)
+
+        # Queue time for a rate token is reported by the scheduler, apart from upstream latency
+        await self.scheduler.acquire()
+
+        if not self.breaker.allow():
+            record_rejection(self.host, "circuit_open")
+            raise CircuitOpenError(f"Circuit open for {self.host}", request=request)
+
+        probe = self.breaker.state == "half_open"
+        recorded = False
+        try:
+            await self._acquire_slot(request)
+            released = False
+
+            async def release():
+                nonlocal released
+                if not released:
+                    released = True
+                    await self.limiter.release()
+
+            started = time.monotonic()
+            try:
+                response = await transport.handle_async_request(request)
+            except Exception:
+                recorded = True
+                self._record(True, time.monotonic() - started)
+                await release()
+                raise
+            except BaseException:
+                # Cancelled by the caller, which says nothing about the upstream
+                await release()
+                raise
+
+            # Latency is time to response headers, so streamed bodies do not count as slow calls
+            recorded = True
+            self._record(is_failure_status(response.status_code), time.monotonic() - started)
+            if response.is_closed:
+                # Body was already read in full by the transport
+                await release()
+            else:
+                response.stream = _ReleasingStream(response.stream, release)
+            return response
+        finally:
+            if probe and not recorded:
+                # A probe that was cancelled or never got a slot reports nothing,
+                # and without its slot back the breaker would stay half open
+                self.breaker.release_probe()
+
+    async def _acquire_slot(self, request: httpx.Request) -> None:
+        try:
+            await self.limiter.acquire()
+        except asyncio.TimeoutError:
+            record_rejection(self.host, "concurrency_limit")
+            raise ConcurrencyLimitExceeded(
+                f"No capacity for {self.host} within {LIMIT_QUEUE_TIMEOUT}s", request=request
+            )
+
+    def _record(self, failed: bool, latency: float) -> None:
+        self.breaker.record(failed, latency)
+        self.limiter.record(failed, latency)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "scheduler": self.scheduler.stats(),
+            "breaker": self.breaker.stats(),
+            "limiter": self.limiter.stats(),
+        }
+
+
+class UpstreamRegistry:
+    def __init__(self):
+        self.upstreams: Dict[str, Upstream] = {}
+
+    def get(self, host: str) -> Upstream:
+        upstream = self.upstreams.get(host)
+        if upstream is None:
+            upstream = Upstream(host)
+            self.upstreams[host] = upstream
+        return upstream
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: upstream.stats() for host, upstream in self.upstreams.items()}
+
+
+class ResilientTransport(httpx.AsyncBaseTransport):
+    """
+    Wraps the real transport of a pooled client, so every request to an upstream host
+    goes through that host's breaker and limiter
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, upstreams: UpstreamRegistry):
+        self.transport = transport
+        self.upstreams = upstreams
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return await self.upstreams.get(request.url.host).send(request, self.transport)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+upstreams = UpstreamRegistry()
+
+__all__ = ['CircuitBreaker', 'AdaptiveLimiter', 'Upstream', 'UpstreamRegistry', 'ResilientTransport',
+           'CircuitOpenError', 'ConcurrencyLimitExceeded', 'upstreams', 'RESILIENCE_ENABLED']
@@ -0,0 +1,220 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Dict, Any, Callable, Awaitable, List, Tuple, Optional, Deque
+
+import httpx
+
+from app.clients.metrics import record_queue_wait
+
+logger = logging.getLogger(__name__)
+
+# Priority classes, lower runs first
+INTERACTIVE = 0
+BACKGROUND = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BACKGROUND: "background"}
+
+# Priority of the outbound calls made by the current task; prefetches and cache refreshes lower it
+request_priority: ContextVar[int] = ContextVar("request_priority", default=INTERACTIVE)
+
+
+def parse_rate_settings(value: str) -> Dict[str, Tuple[float, float]]:
+    """Parse "host=rate/burst,host=rate/burst" settings (rate in requests per second)"""
+    settings = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        host, limits = item.split("=", 1)
+        rate, _, burst = limits.partition("/")
+        settings[host.strip()] = (float(rate), float(burst or rate))
+    return settings
+
+
+def parse_host_settings(value: str) -> Dict[str, float]:
+    """Parse "host=value,host=value" settings with fractional values"""
+    settings = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        host, setting = item.split("=", 1)
+        settings[host.strip()] = float(setting)
+    return settings
+
+
+# Hosts without an entry are not rate limited, only measured
+UPSTREAM_RATE_LIMITS = parse_rate_settings(os.environ.get("UPSTREAM_RATE_LIMITS", ""))
+SCHEDULER_WAIT_SAMPLES = int(os.environ.get("SCHEDULER_WAIT_SAMPLES", "500"))
+
+
+async def run_with_priority(priority: int, fn: Callable[[], Awaitable[Any]]) -> Any:
+    """Await `fn` with every upstream call it makes scheduled at `priority`"""
+    token = request_priority.set(priority)
+    try:
+        return await fn()
+    finally:
+        request_priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def take(self) -> bool:
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    def wait_time(self) -> float:
+        self._refill()
+        return max(0.0, (1 - self.tokens) / self.rate)
+
+
+class QueueStats:
+    def __init__(self):
+        self.scheduled = 0
+        self.queued = 0
+        self.waits: Deque[float] = deque(maxlen=SCHEDULER_WAIT_SAMPLES)
+        self.max_wait = 0.0
+
+    def record(self, wait: float) -> None:
+        self.scheduled += 1
+        self.waits.append(wait)
+        self.max_wait = max(self.max_wait, wait)
+
+    def stats(self) -> Dict[str, Any]:
+        waits = sorted(self.waits)
+
+        def percentile(p: float) -> Optional[float]:
+            if not waits:
+                return None
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 1)
+
+        return {
+            "scheduled": self.scheduled,
+            "queued": self.queued,
+            "wait_p50_ms": percentile(0.5),
+            "wait_p95_ms": percentile(0.95),
+            "wait_max_ms": round(self.max_wait * 1000, 1),
+        }
+
+
+class RateScheduler:
+    """
+    Token bucket for one upstream host. Calls that cannot take a token right away wait in a
+    priority queue, so queued background work only goes out when no interactive call is waiting.
+    """
+
+    def __init__(self, host: str, rate_limit: Optional[Tuple[float, float]] = None):
+        self.host = host
+        self.bucket = TokenBucket(*rate_limit) if rate_limit else None
+        self.queue: List[Tuple[int, int, asyncio.Future]] = []
+        self.sequence = itertools.count()
+        self.pump: Optional[asyncio.Task] = None
+        self.queue_stats = {priority: QueueStats() for priority in PRIORITY_NAMES}
+
+    async def acquire(self, priority: Optional[int] = None) -> float:
+        """Wait for permission to send; returns the time spent queued"""
+        priority = request_priority.get() if priority is None else priority
+        if priority not in self.queue_stats:
+            priority = BACKGROUND
+        stats = self.queue_stats[priority]
+
+        if self.bucket is None or (not self.queue and self.bucket.take()):
+            stats.record(0.0)
+            record_queue_wait(self.host, PRIORITY_NAMES[priority], 0.0)
+            return 0.0
+
+        started = time.monotonic()
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self.queue, (priority, next(self.sequence), future))
+        if self.pump is None or self.pump.done():
+            self.pump = asyncio.ensure_future(self._pump())
+
+        stats.queued += 1
+        try:
+            await future
+        finally:
+            stats.queued -= 1
+            # A cancelled waiter stays in the heap and is skipped by the pump
+            future.cancel()
+
+        wait = time.monotonic() - started
+        stats.record(wait)
+        record_queue_wait(self.host, PRIORITY_NAMES[priority], wait)
+        return wait
+
+    async def _pump(self) -> None:
+        while self.queue:
+            if self.queue[0][2].done():
+                heapq.heappop(self.queue)
+                continue
+            if self.bucket.take():
+                _, _, future = heapq.heappop(self.queue)
+                future.set_result(None)
+                continue
+            await asyncio.sleep(self.bucket.wait_time())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "rate_per_second": self.bucket.rate if self.bucket else None,
+            "burst": self.bucket.burst if self.bucket else None,
+            **{PRIORITY_NAMES[priority]: stats.stats() for priority, stats in self.queue_stats.items()},
+        }
+
+
+def scheduler_for(host: str) -> RateScheduler:
+    return RateScheduler(host, UPSTREAM_RATE_LIMITS.get(host))
+
+
+class SchedulerRegistry:
+    def __init__(self):
+        self.schedulers: Dict[str, RateScheduler] = {}
+
+    def get(self, host: str) -> RateScheduler:
+        scheduler = self.schedulers.get(host)
+        if scheduler is None:
+            scheduler = scheduler_for(host)
+            self.schedulers[host] = scheduler
+        return scheduler
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        return {host: scheduler.stats() for host, scheduler in self.schedulers.items()}
+
+
+class ScheduledTransport(httpx.AsyncBaseTransport):
+    """
+    Rate scheduling on its own, used when the resilience layer is off. That layer otherwise takes
+    the token itself, between its breaker checks, so rate limits and priorities hold either way.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, schedulers: SchedulerRegistry):
+        self.transport = transport
+        self.schedulers = schedulers
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await self.schedulers.get(request.url.host).acquire()
+        return await self.transport.handle_async_request(request)
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+schedulers = SchedulerRegistry()
+
+__all__ = ['RateScheduler', 'SchedulerRegistry', 'ScheduledTransport', 'TokenBucket', 'schedulers', 'scheduler_for',
+           'parse_host_settings', 'run_with_priority', 'request_priority', 'INTERACTIVE', 'BACKGROUND']
@@ -0,0 +1,191 @@
+import functools
+import inspect
+import logging
+import os
+import threading
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import httpx
+from opentelemetry import propagate, trace
+from opentelemetry.sdk.resources import Resource
+from opentelemetry.sdk.trace import ReadableSpan, TracerProvider
+from opentelemetry.sdk.trace.export import BatchSpanProcessor, ConsoleSpanExporter, SpanExporter, SpanExportResult
+from opentelemetry.trace import SpanKind, Status, StatusCode
+
+try:
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+except ImportError:  # optional, only needed for TRACING_EXPORTER=otlp
+    OTLPSpanExporter = None
+
+logger = logging.getLogger(__name__)
+
+TRACING_ENABLED = os.environ.get("TRACING_ENABLED", "false").lower() == "true"
+# otlp (OTLP over HTTP, endpoint from OTEL_EXPORTER_OTLP_ENDPOINT), json (one span per line) or console
+TRACING_EXPORTER = os.environ.get("TRACING_EXPORTER", "json").lower()
+TRACING_JSON_PATH = os.environ.get("TRACING_JSON_PATH", "traces.jsonl")
+TRACING_SERVICE_NAME = os.environ.get("TRACING_SERVICE_NAME", "tastetrails-ai")
+# Upstream hosts that receive our traceparent header; third-party APIs get none by default
+TRACING_PROPAGATE_HOSTS = {host.strip() for host in os.environ.get("TRACING_PROPAGATE_HOSTS", "").split(",")
+                           if host.strip()}
+
+tracer = trace.get_tracer("tastetrails")
+tracer_provider: Optional[TracerProvider] = None
+
+
+class JsonFileSpanExporter(SpanExporter):
+    """Appends finished spans to a file as JSON lines, for offline analysis without a collector"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, spans: Sequence[ReadableSpan]) -> SpanExportResult:
+        lines = "".join(span.to_json(indent=None) + "\n" for span in spans)
+        try:
+            with self.lock, open(self.path, "a", encoding="utf-8") as file:
+                file.write(lines)
+        except OSError as e:
+            logger.error(f"Failed to write spans to {self.path}: {e}")
+            return SpanExportResult.FAILURE
+        return SpanExportResult.SUCCESS
+
+    def shutdown(self) -> None:
+        pass
+
+
+def create_exporter() -> SpanExporter:
+    if TRACING_EXPORTER == "otlp":
+        if OTLPSpanExporter is not None:
+            return OTLPSpanExporter()
+        logger.warning("opentelemetry-exporter-otlp-proto-http is not installed, writing spans to a JSON file")
+    elif TRACING_EXPORTER == "console":
+        return ConsoleSpanExporter()
+    return JsonFileSpanExporter(TRACING_JSON_PATH)
+
+
+def configure_tracing() -> None:
+    global tracer_provider
+    if not TRACING_ENABLED or tracer_provider is not None:
+        return
+    tracer_provider = TracerProvider(resource=Resource.create({"service.name": TRACING_SERVICE_NAME}))
+    tracer_provider.add_span_processor(BatchSpanProcessor(create_exporter()))
+    trace.set_tracer_provider(tracer_provider)
+
+
+def shutdown_tracing() -> None:
+    """Flush the spans still queued for export"""
+    if tracer_provider is not None:
+        tracer_provider.shutdown()
+
+
+def traced(name: Optional[str] = None) -> Callable:
+    """
+    Run an async function, or iterate an async generator, inside a span named `name`
+    (default: its qualified name). Without TRACING_ENABLED the function is returned unchanged.
+    """
+    def decorator(fn: Callable) -> Callable:
+        if not TRACING_ENABLED:
+            return fn
+        span_name = name or fn.__qualname__
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def generator_wrapper(*args, **kwargs):
+                # The span is only made current while the generator runs, since the consumer
+                # may resume it from another context
+                span = tracer.start_span(span_name)
+                generator = fn(*args, **kwargs)
+                try:
+                    while True:
+                        with trace.use_span(span):
+                            try:
+                                item = await generator.__anext__()
+                            except StopAsyncIteration:
+                                break
+                        yield item
+                finally:
+                    await generator.aclose()
+                    span.end()
+            return generator_wrapper
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            with tracer.start_as_current_span(span_name):
+                return await fn(*args, **kwargs)
+        return wrapper
+
+    return decorator
+
+
+def span_attributes(attributes: Dict[str, Any]) -> None:
+    """Add attributes to the current span, if any is recording"""
+    span = trace.get_current_span()
+    if span.is_recording():
+        span.set_attributes(attributes)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a server span per request, continuing the caller's trace
+    when the request carries a traceparent header
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        headers = {key.decode("latin-1"): value.decode("latin-1") for key, value in scope["headers"]}
+        # Renamed after the route template once routing is done, so paths never become span names
+        with tracer.start_as_current_span(f"HTTP {scope['method']}", context=propagate.extract(headers),
+                                          kind=SpanKind.SERVER) as span:
+            span.set_attribute("http.request.method", scope["method"])
+
+            async def send_and_trace(message):
+                if message["type"] == "http.response.start":
+                    route = getattr(scope.get("route"), "path", None)
+                    if route is not None:
+                        span.update_name(f"{scope['method']} {route}")
+                        span.set_attribute("http.route", route)
+                    span.set_attribute("http.response.status_code", message["status"])
+                    if message["status"] >= 500:
+                        span.set_status(Status(StatusCode.ERROR))
+                await send(message)
+
+            await self.app(scope, receive, send_and_trace)
+
+
+class TracingTransport(httpx.AsyncBaseTransport):
+    """Client span per upstream request, named after the operation it is measured under in /metrics"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self.transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        span_name = request.extensions.get("operation", f"{request.method} {request.url.host}")
+        with tracer.start_as_current_span(span_name, kind=SpanKind.CLIENT) as span:
+            span.set_attributes({
+                "http.request.method": request.method,
+                "server.address": request.url.host,
+                "url.path": request.url.path,
+            })
+            if request.url.host in TRACING_PROPAGATE_HOSTS:
+                propagate.inject(request.headers)
+
+            response = await self.transport.handle_async_request(request)
+            span.set_attribute("http.response.status_code", response.status_code)
+            if response.status_code >= 400:
+                span.set_status(Status(StatusCode.ERROR))
+            return response
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+configure_tracing()
+
+__all__ = ['TracingMiddleware', 'TracingTransport', 'JsonFileSpanExporter', 'traced', 'tracer', 'span_attributes',
+           'shutdown_tracing', 'TRACING_ENABLED']
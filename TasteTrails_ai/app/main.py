@@ -1,7 +1,29 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import qloo_routes, claude_routes, google_maps_routes
-app = FastAPI(title="TasteTrails AI")
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.api import qloo_routes, claude_routes, google_maps_routes, profiling_routes
+from app.clients.hedging import hedgers
+from app.clients.http_client import http_clients
+from app.clients.metrics import RouteMetricsMiddleware
+from app.clients.profiling import ProfilingMiddleware, PROFILING_AVAILABLE, PROFILING_ADMIN_ENABLED
+from app.clients.resilience import RESILIENCE_ENABLED
+from app.clients.scheduler import schedulers
+from app.clients.tracing import TracingMiddleware, shutdown_tracing, TRACING_ENABLED
+from app.clients.redis_client import get_redis_cache
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Pooled upstream clients live for the whole app and are shared by Qloo, Google Maps and Claude clients
+    app.state.http_clients = http_clients
+    yield
+    await http_clients.close()
+    shutdown_tracing()
+
+
+app = FastAPI(title="TasteTrails AI", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
@@ -9,16 +31,46 @@ app.add_middleware(
     allow_headers=["*"],
     allow_methods=["*"]
 )
+app.add_middleware(RouteMetricsMiddleware)
+if TRACING_ENABLED:
+    app.add_middleware(TracingMiddleware)
+if PROFILING_AVAILABLE:
+    app.add_middleware(ProfilingMiddleware)
 app.include_router(qloo_routes.router, tags=["qloo"])
 app.include_router(claude_routes.router, tags=["claude"])
 app.include_router(google_maps_routes.router, prefix="/google-maps", tags=["google maps"])
+if PROFILING_ADMIN_ENABLED:
+    app.include_router(profiling_routes.router, tags=["profiling"])
 
 
 @app.get("/health")
 def health_check():
     return {"service": "TasteTrails AI", "status": "running"}
 
+
+@app.get("/health/upstreams")
+def upstream_stats():
+    if not RESILIENCE_ENABLED:
+        return {host: {"scheduler": stats} for host, stats in schedulers.stats().items()}
+    return http_clients.upstreams.stats()
+
+
+@app.get("/health/hedging")
+def hedging_stats():
+    return hedgers.stats()
+
+
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@app.get("/health/cache")
+async def cache_stats():
+    redis_cache = await get_redis_cache()
+    return redis_cache.stats()
+
 if __name__ == "__main__":
     import uvicorn
 
-    uvicorn.run(app, host="0.0.0.0", port=8001)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8001)
@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Optional, List
 from pydantic import BaseModel, Field
 
 
@@ -11,6 +11,16 @@ class AddressRequest(BaseModel):
         example="1600 Amphitheatre Parkway, Mountain View, CA"
     )
 
+# noinspection PyArgumentList
+class GeocodeBatchRequest(BaseModel):
+    addresses: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=100,
+        description="Addresses or location names to geocode",
+        example=["Times Square, New York", "Central Park, New York"]
+    )
+
 # noinspection PyArgumentList
 class RoutesRequest(BaseModel):
     start_address: str = Field(
@@ -31,6 +41,28 @@ class RoutesRequest(BaseModel):
         example="WALK"
     )
 
+# noinspection PyArgumentList
+class RouteMatrixRequest(BaseModel):
+    origins: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=25,
+        description="Starting addresses or locations (rows of the matrix)",
+        example=["Times Square, New York", "Central Park, New York"]
+    )
+    destinations: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=25,
+        description="Destination addresses or locations (columns of the matrix)",
+        example=["Central Park, New York", "Brooklyn Bridge, New York"]
+    )
+    travel_mode: str = Field(
+        default="WALK",
+        description="Mode of travel: WALK, DRIVE, BICYCLE, or TRANSIT",
+        example="WALK"
+    )
+
 # noinspection PyArgumentList
 class VenueRequest(BaseModel):
     coordinates: str = Field(
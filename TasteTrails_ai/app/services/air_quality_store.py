@@ -0,0 +1,132 @@
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Any, List
+
+import httpx
+
+from app.clients.google_maps_client import GoogleMapsClient
+from app.clients.redis_client import get_redis_cache
+from app.clients.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+AIR_QUALITY_HOURS_TTL = int(os.environ.get("AIR_QUALITY_HOURS_TTL", "3600"))
+
+# Stored for hours the API returned no UAQI for, so they are not fetched again
+NO_DATA = ""
+
+
+class AirQualityStore:
+    """
+    Keeps hourly UAQI values in one Redis hash per location and day (field = hour of day).
+    A range request is assembled from the stored hours and only the missing span is fetched,
+    so overlapping slots on the same day share the hours they have in common.
+    """
+
+    def __init__(self, client: GoogleMapsClient):
+        self.client = client
+        self.ttl_seconds = AIR_QUALITY_HOURS_TTL
+
+    @staticmethod
+    def _hours(start_datetime: datetime, end_datetime: datetime) -> List[datetime]:
+        """Whole UTC hours inside [start, end], which are the only forecast points the parser keeps"""
+        hour = start_datetime.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+        if hour < start_datetime:
+            hour += timedelta(hours=1)
+
+        hours = []
+        while hour <= end_datetime:
+            hours.append(hour)
+            hour += timedelta(hours=1)
+        return hours
+
+    @staticmethod
+    def _hash_key(redis_cache, coordinates: str, day: str) -> str:
+        return redis_cache.generate_cache_key("air_quality_hours", {
+            "coordinates": coordinates.strip(),
+            "date": day
+        })
+
+    @staticmethod
+    def _by_day(hours: List[datetime]) -> Dict[str, List[datetime]]:
+        days: Dict[str, List[datetime]] = {}
+        for hour in hours:
+            days.setdefault(hour.strftime("%Y-%m-%d"), []).append(hour)
+        return days
+
+    async def _read(self, redis_cache, coordinates: str, hours: List[datetime]) -> Dict[datetime, Any]:
+        days = self._by_day(hours)
+        stored = await asyncio.gather(*(
+            redis_cache.get_hash_fields(self._hash_key(redis_cache, coordinates, day),
+                                        [hour.strftime("%H") for hour in day_hours])
+            for day, day_hours in days.items()
+        ))
+
+        values = {}
+        for day_hours, fields in zip(days.values(), stored):
+            for hour in day_hours:
+                values[hour] = fields.get(hour.strftime("%H"))
+        return values
+
+    async def _fetch(self, redis_cache, coordinates: str, first: datetime, last: datetime) -> Dict[datetime, Any]:
+        """Fetch the span [first, last] and store every hour of it, using NO_DATA for gaps"""
+        forecasts = await self.client.fetch_hourly_air_quality(coordinates, first, last + timedelta(hours=1))
+
+        fetched: Dict[datetime, Any] = {}
+        for forecast in forecasts:
+            try:
+                dt = datetime.fromisoformat(forecast.get("dateTime", "").replace("Z", "+00:00"))
+            except ValueError:
+                continue
+
+            aqi = next((index.get("aqi", 0) for index in forecast.get("indexes", [])
+                        if index.get("code") == "uaqi"), None)
+            fetched[dt.astimezone(timezone.utc)] = NO_DATA if aqi is None else str(aqi)
+
+        span = []
+        hour = first
+        while hour <= last:
+            span.append(hour)
+            fetched.setdefault(hour, NO_DATA)
+            hour += timedelta(hours=1)
+
+        await asyncio.gather(*(
+            redis_cache.set_hash_fields(
+                self._hash_key(redis_cache, coordinates, day),
+                {hour.strftime("%H"): fetched[hour] for hour in day_hours},
+                ttl_seconds=self.ttl_seconds
+            )
+            for day, day_hours in self._by_day(span).items()
+        ))
+        return fetched
+
+    @traced()
+    async def hourly_range(self, coordinates: str, start_datetime: datetime, end_datetime: datetime) -> Dict[str, Any]:
+        try:
+            redis_cache = await get_redis_cache()
+
+            hours = self._hours(start_datetime, end_datetime)
+            values = await self._read(redis_cache, coordinates, hours)
+
+            missing = [hour for hour in hours if values[hour] is None]
+            if missing:
+                logger.info(f"Fetching {len(missing)} of {len(hours)} air quality hours for {coordinates}")
+                fetched = await self._fetch(redis_cache, coordinates, missing[0], missing[-1])
+                for hour in missing:
+                    values[hour] = fetched[hour]
+
+            # Same daily averaging as a direct lookup, run over the assembled series
+            forecasts = [
+                {"dateTime": hour.isoformat(), "indexes": [{"code": "uaqi", "aqi": int(values[hour])}]}
+                for hour in hours if values[hour] != NO_DATA
+            ]
+            return self.client._parse_air_quality_data({"hourlyForecasts": forecasts}, start_datetime, end_datetime)
+        except httpx.HTTPStatusError as e:
+            return {"success": False, "error": f"API error: {e.response.status_code}"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+
+__all__ = ['AirQualityStore']
@@ -1,12 +1,13 @@
 import json
 import logging
-import os
-from datetime import datetime, date
-
-import httpx
-from fastapi import HTTPException
+from datetime import date
+from typing import Dict, Any, AsyncIterator
 
 from app.clients.claude_client import claude_client
+from app.clients.tracing import traced
+from app.services.context_compactor import context_compactor
+from app.services.context_service import context_service
+from app.services.option_stream_parser import OptionStreamParser
 
 logger = logging.getLogger(__name__)
 
@@ -14,70 +15,22 @@ logger = logging.getLogger(__name__)
 class ClaudeService:
     def __init__(self):
         self.client = claude_client
-        self.fastapi_base_url = "http://localhost:8001"
-
-
-    async def generate_activity(self, user_preferences, city, coordinates,start_time, end_time, activity_date, theme,
-                                existing_activities):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.fastapi_base_url}/qloo/recommendations",
-                    json={"user_preferences": user_preferences, "limit": 5},
-                    timeout=10.0
-                )
-                if response.status_code != 200:
-                    raise HTTPException(status_code=500, detail="Qloo failed")
-                cultural_profile = response.json()
-
-                response = await client.post(
-                    f"{self.fastapi_base_url}/google-maps/venues",
-                    json={"coordinates": coordinates},
-                    timeout=10.0
-                )
-                if response.status_code != 200:
-                    raise HTTPException(status_code=500, detail="Google Maps failed")
-
-                nearby_venues = response.json()
-
-
-                target_date = datetime.strptime(activity_date, "%Y-%m-%d").date()
-                today = date.today()
-                days_diff = (target_date - today).days
-
-                if days_diff < 4:
-                    response = await client.post(
-                        f"{self.fastapi_base_url}/google-maps/weather-route",
-                        json={"coordinates": coordinates, "days_ahead": days_diff},
-                        timeout=10.0
-                    )
-                    if response.status_code != 200:
-                        raise HTTPException(status_code=500, detail="Google Maps failed")
-
-                    weather_info = response.json()
-                else:
-                    weather_info = ""
-
-                response = await client.post(
-                    f"{self.fastapi_base_url}/google-maps/air-quality",
-                    json={"coordinates": coordinates,
-                          "start_hour": str(start_time),
-                          "end_hour": str(end_time),
-                          "target_date": str(activity_date)},
-                    timeout=10.0
-                )
-
-                air_quality_info = response.json()
-
-                response = await client.post(
-                    f"{self.fastapi_base_url}/google-maps/pollen-forecast",
-                    json={"coordinates": coordinates, "target_date": activity_date},
-                    timeout=10.0
-                )
-
-                pollen_info = response.json()
-
-            prompt = f"""
+        self.context = context_service
+
+
+    @staticmethod
+    def _activity_prompt(user_preferences, city, start_time, end_time, activity_date, theme, existing_activities,
+                         context) -> str:
+        sections = context_compactor.compact_activity_context(context, user_preferences, existing_activities)["sections"]
+        cultural_profile = sections["cultural_profile"]
+        nearby_venues = sections["venues"]
+        weather_info = sections["weather"]
+        air_quality_info = sections["air_quality"]
+        pollen_info = sections["pollen"]
+        existing_activities = sections["existing_activities"]
+        user_preferences = sections["user_preferences"]
+
+        return f"""
                         Have the mindset of an expert trip advisor for {theme} that knows all the activities and periodic events in the city {city}, between the time period: {start_time} to {end_time} on date {activity_date}.
                         Google Places API recommends the following: {nearby_venues}
                         The air quality is the following: {air_quality_info}
@@ -135,43 +88,17 @@ class ClaudeService:
                         - When reasoning, use second person addressing, as talking directly with the user
                         - The reasoning should be short and clear, not more than a sentence
                         """
-            result = await self.client.generate(prompt)
 
-            if result.get("success"):
-                try:
-                    return {"success": True, "data": json.loads(result["content"])}
-                except:
-                    return {"success": False, "error": "JSON parse failure"}
-            else:
-                return {"success": False, "error": result.get("error")}
+    @staticmethod
+    def _today_prompt(user_preferences, today_date, context) -> str:
+        sections = context_compactor.compact_today_context(context, user_preferences)["sections"]
+        cultural_profile = sections["cultural_profile"]
+        recommended_cities = sections["recommended_cities"]
+        user_preferences = sections["user_preferences"]
 
-        except Exception as e:
-            return {"success": False, "error": str(e)}
-
-    async def generate_options_today(self, user_preferences, itinerary_cities, today_date):
-        try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    f"{self.fastapi_base_url}/qloo/recommendations",
-                    json={"user_preferences": user_preferences, "limit": 5},
-                    timeout=10.0
-                )
-                if response.status_code != 200:
-                    raise HTTPException(status_code=500, detail="Qloo failed")
-                cultural_profile = response.json()
-
-                response = await client.post(
-                    f"{self.fastapi_base_url}/qloo/recommendation-cities",
-                    json={"itinerary_cities": itinerary_cities, "limit": 5},
-                    timeout=10.0
-                )
-                if response.status_code != 200:
-                    raise HTTPException(status_code=500, detail="Qloo failed")
-                recommended_cities = response.json()
-
-            prompt = f"""
+        return f"""
                         Have the mindset of an expert trip advisor that knows all the activities and periodic events today, {today_date}.
-                        The cities Qloo recommends {recommended_cities.get("recommended_cities")}, but choose any other city in the world if there is a better fit
+                        The cities Qloo recommends {recommended_cities}, but choose any other city in the world if there is a better fit
                         User's preferences are: {user_preferences}
                         Qloo's recommendations are: {cultural_profile}
 
@@ -214,6 +141,38 @@ class ClaudeService:
                         - When reasoning, use second person addressing, as talking directly with the user
                         - The reasoning should be short and clear, not more than a sentence
                         """
+
+    @traced()
+    async def generate_activity(self, user_preferences, city, coordinates,start_time, end_time, activity_date, theme,
+                                existing_activities):
+        try:
+            context = await self.context.assemble_activity_context(
+                user_preferences,
+                coordinates,
+                start_time,
+                end_time,
+                activity_date
+            )
+            prompt = self._activity_prompt(user_preferences, city, start_time, end_time, activity_date, theme,
+                                           existing_activities, context)
+            result = await self.client.generate(prompt)
+
+            if result.get("success"):
+                try:
+                    return {"success": True, "data": json.loads(result["content"])}
+                except:
+                    return {"success": False, "error": "JSON parse failure"}
+            else:
+                return {"success": False, "error": result.get("error")}
+
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    @traced()
+    async def generate_options_today(self, user_preferences, itinerary_cities, today_date):
+        try:
+            context = await self.context.assemble_today_context(user_preferences, itinerary_cities)
+            prompt = self._today_prompt(user_preferences, today_date, context)
             result = await self.client.generate(prompt)
 
             if result.get("success"):
@@ -227,6 +186,39 @@ class ClaudeService:
         except Exception as e:
             return {"success" : False, "error" : str(e)}
 
+    @traced()
+    async def stream_activity(self, user_preferences, city, coordinates, start_time, end_time, activity_date, theme,
+                              existing_activities) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Same prompt as generate_activity, yielding each option as soon as Claude has finished writing it
+        """
+        context = await self.context.assemble_activity_context(
+            user_preferences,
+            coordinates,
+            start_time,
+            end_time,
+            activity_date
+        )
+        prompt = self._activity_prompt(user_preferences, city, start_time, end_time, activity_date, theme,
+                                       existing_activities, context)
+
+        async for option in self._stream_options(prompt):
+            yield option
+
+    @traced()
+    async def stream_options_today(self, user_preferences, itinerary_cities, today_date) -> AsyncIterator[Dict[str, Any]]:
+        context = await self.context.assemble_today_context(user_preferences, itinerary_cities)
+        prompt = self._today_prompt(user_preferences, today_date, context)
+
+        async for option in self._stream_options(prompt):
+            yield option
+
+    async def _stream_options(self, prompt: str) -> AsyncIterator[Dict[str, Any]]:
+        parser = OptionStreamParser()
+
+        async for text in self.client.stream(prompt):
+            for option in parser.feed(text):
+                yield option
 
 
 claude_service = ClaudeService()
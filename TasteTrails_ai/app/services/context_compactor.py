@@ -0,0 +1,260 @@
+import copy
+import json
+import logging
+import math
+import os
+from typing import Any, Callable, Dict, List
+
+logger = logging.getLogger(__name__)
+
+PROMPT_COMPACTION_ENABLED = os.environ.get("PROMPT_COMPACTION_ENABLED", "true").lower() == "true"
+
+# Token budget per prompt source, overridable with PROMPT_BUDGET_<SOURCE>
+DEFAULT_TOKEN_BUDGETS = {
+    "venues": 700,
+    "air_quality": 150,
+    "pollen": 200,
+    "weather": 300,
+    "existing_activities": 600,
+    "user_preferences": 400,
+    "cultural_profile": 900,
+    "recommended_cities": 300,
+}
+
+
+def token_budget(source: str) -> int:
+    return int(os.environ.get(f"PROMPT_BUDGET_{source.upper()}", DEFAULT_TOKEN_BUDGETS[source]))
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token estimate, about four characters per token"""
+    return math.ceil(len(text) / 4)
+
+
+def compact_json(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+def without_empty(value: Any) -> Any:
+    """Recursively drop None values and empty containers from parsed API data"""
+    if isinstance(value, dict):
+        cleaned = {key: without_empty(item) for key, item in value.items()}
+        return {key: item for key, item in cleaned.items() if item not in (None, {}, [])}
+    if isinstance(value, list):
+        return [without_empty(item) for item in value if item is not None]
+    return value
+
+
+class ContextCompactor:
+    """
+    Projects each prompt source down to the fields the prompt uses, serializes it compactly
+    and trims it to its token budget, dropping the lowest-value items first
+    """
+
+    def compact_activity_context(self, context: Dict[str, Any], user_preferences,
+                                 existing_activities) -> Dict[str, Any]:
+        sources = {
+            "venues": (context["nearby_venues"], self._fit_venues),
+            "air_quality": (context["air_quality_info"], self._fit_air_quality),
+            "pollen": (context["pollen_info"], self._fit_pollen),
+            "weather": (context["weather_info"], self._fit_weather),
+            "existing_activities": (existing_activities, self._fit_existing_activities),
+            "user_preferences": (user_preferences, self._fit_user_preferences),
+            "cultural_profile": (context["cultural_profile"], self._fit_cultural_profile),
+        }
+        return self._compact(sources)
+
+    def compact_today_context(self, context: Dict[str, Any], user_preferences) -> Dict[str, Any]:
+        sources = {
+            "recommended_cities": (context["recommended_cities"].get("recommended_cities"),
+                                   self._fit_recommended_cities),
+            "user_preferences": (user_preferences, self._fit_user_preferences),
+            "cultural_profile": (context["cultural_profile"], self._fit_cultural_profile),
+        }
+        return self._compact(sources)
+
+    @staticmethod
+    def _compact(sources: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns the text to interpolate for each source plus before/after token estimates.
+        With compaction disabled the sources are rendered exactly as before (Python repr).
+        """
+        sections = {}
+        stats = {}
+
+        for source, (value, fit) in sources.items():
+            original = f"{value}"
+            compacted = fit(value, token_budget(source)) if PROMPT_COMPACTION_ENABLED else original
+            sections[source] = compacted
+            stats[source] = {
+                "before": estimate_tokens(original),
+                "after": estimate_tokens(compacted),
+            }
+
+        before = sum(item["before"] for item in stats.values())
+        after = sum(item["after"] for item in stats.values())
+        logger.info(f"Prompt context compacted from ~{before} to ~{after} tokens: {stats}")
+
+        return {
+            "sections": sections,
+            "stats": stats,
+            "tokens_before": before,
+            "tokens_after": after,
+        }
+
+    @staticmethod
+    def _fit_list(items: List[Any], budget: int, drop: Callable[[List[Any]], None]) -> str:
+        """Drop items (lowest value first, as decided by `drop`) until the serialized list fits the budget"""
+        items = list(items)
+        text = compact_json(items)
+        while items and estimate_tokens(text) > budget:
+            drop(items)
+            text = compact_json(items)
+        return text
+
+    @staticmethod
+    def _drop_last(items: List[Any]) -> None:
+        items.pop()
+
+    @staticmethod
+    def _drop_first(items: List[Any]) -> None:
+        items.pop(0)
+
+    @staticmethod
+    def _longest_list(value: Any) -> List[Any]:
+        """The longest non-empty list anywhere inside `value`, or an empty list"""
+        if isinstance(value, dict):
+            children, longest = list(value.values()), []
+        elif isinstance(value, list):
+            children, longest = value, value
+        else:
+            return []
+        for child in children:
+            candidate = ContextCompactor._longest_list(child)
+            if len(candidate) > len(longest):
+                longest = candidate
+        return longest
+
+    def _fit_fields(self, fields: Dict[str, Any], budget: int) -> str:
+        """
+        Trim the longest list inside `fields` from its tail until the serialized dict fits the budget,
+        then drop trailing fields, so the text stays valid JSON and every list keeps its leading items
+        """
+        fields = copy.deepcopy(fields)
+        text = compact_json(fields)
+        while fields and estimate_tokens(text) > budget:
+            longest = self._longest_list(fields)
+            if longest:
+                longest.pop()
+            else:
+                fields.popitem()
+            text = compact_json(fields)
+        return text
+
+    def _fit_value(self, value: Any, budget: int) -> str:
+        if isinstance(value, dict):
+            return self._fit_fields(value, budget)
+        if isinstance(value, list):
+            return self._fit_list(value, budget, self._drop_last)
+        return self._fit_text(value, budget)
+
+    @staticmethod
+    def _fit_text(value: Any, budget: int) -> str:
+        """Cut unstructured text at the budget; structured values go through _fit_value"""
+        text = value if isinstance(value, str) else compact_json(value)
+        max_chars = budget * 4
+        return text if len(text) <= max_chars else text[:max_chars] + "..."
+
+    def _fit_venues(self, nearby_venues: Any, budget: int) -> str:
+        venues = nearby_venues.get("venues", []) if isinstance(nearby_venues, dict) else []
+        projected = [
+            {
+                "name": venue.get("name"),
+                "address": venue.get("address"),
+                "rating": venue.get("rating"),
+                "types": venue.get("types", [])[:3],
+            }
+            for venue in venues if isinstance(venue, dict)
+        ]
+        # Highest rated first so the lowest rated venues are the first to go
+        projected.sort(key=lambda venue: venue.get("rating") or 0.0, reverse=True)
+        return self._fit_list(projected, budget, self._drop_last)
+
+    def _fit_air_quality(self, air_quality_info: Any, budget: int) -> str:
+        if isinstance(air_quality_info, dict) and air_quality_info.get("success"):
+            daily = air_quality_info.get("daily_forecasts", [])
+            return self._fit_list(daily, budget, self._drop_last)
+        return self._fit_value(air_quality_info, budget)
+
+    def _fit_pollen(self, pollen_info: Any, budget: int) -> str:
+        if isinstance(pollen_info, dict) and pollen_info.get("success"):
+            projected = {
+                "overall_level": pollen_info.get("overall_level"),
+                "worst_pollen_type": pollen_info.get("worst_pollen_type"),
+                "pollen_summary": pollen_info.get("pollen_summary", {}),
+                "active_plants": pollen_info.get("active_plants", []),
+            }
+            return self._fit_fields(projected, budget)
+        return self._fit_value(pollen_info, budget)
+
+    def _fit_weather(self, weather_info: Any, budget: int) -> str:
+        if isinstance(weather_info, dict) and weather_info.get("success"):
+            projected = {key: value for key, value in weather_info.items() if key != "success"}
+            return self._fit_fields(without_empty(projected), budget)
+        return self._fit_value(weather_info, budget)
+
+    def _fit_existing_activities(self, existing_activities: Any, budget: int) -> str:
+        if not isinstance(existing_activities, list):
+            return self._fit_value(existing_activities, budget)
+
+        fields = ("name", "location", "activity_date", "start_time")
+        projected = []
+        for activity in existing_activities:
+            if isinstance(activity, dict):
+                projected.append({key: activity[key] for key in fields if activity.get(key)} or activity)
+            else:
+                projected.append(activity)
+
+        # Oldest first, so the oldest activities are the first to be dropped
+        projected.sort(key=lambda activity: (str(activity.get("activity_date", "")), str(activity.get("start_time", "")))
+                       if isinstance(activity, dict) else ("", ""))
+        return self._fit_list(projected, budget, self._drop_first)
+
+    def _fit_user_preferences(self, user_preferences: Any, budget: int) -> str:
+        # Each preference list is in the user's order, so the longest list loses its last entries first
+        if isinstance(user_preferences, dict):
+            user_preferences = {key: value for key, value in user_preferences.items() if value}
+        return self._fit_value(user_preferences, budget)
+
+    def _fit_cultural_profile(self, cultural_profile: Any, budget: int) -> str:
+        categories = {}
+        if isinstance(cultural_profile, dict):
+            recommendations = cultural_profile.get("data", {}).get("recommendations", {})
+            for category, result in recommendations.items():
+                items = result.get("recommendations", []) if isinstance(result, dict) else []
+                categories[category] = [
+                    {"name": item.get("name"), "genres": item.get("genres", [])[:3]}
+                    for item in items if isinstance(item, dict)
+                ]
+
+        def render() -> str:
+            return compact_json({category: items for category, items in categories.items() if items})
+
+        text = render()
+        # Qloo ranks its results, so the tail of the longest category is the least valuable
+        while any(categories.values()) and estimate_tokens(text) > budget:
+            longest = max(categories, key=lambda category: len(categories[category]))
+            categories[longest].pop()
+            text = render()
+        return text
+
+    def _fit_recommended_cities(self, recommended_cities: Any, budget: int) -> str:
+        if not isinstance(recommended_cities, list):
+            return self._fit_value(recommended_cities, budget)
+        projected = [city.get("name") if isinstance(city, dict) else city for city in recommended_cities]
+        return self._fit_list(projected, budget, self._drop_last)
+
+
+context_compactor = ContextCompactor()
+
+__all__ = ['ContextCompactor', 'context_compactor', 'estimate_tokens']
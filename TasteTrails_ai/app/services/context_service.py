@@ -0,0 +1,223 @@
+import asyncio
+import logging
+from datetime import datetime, date
+from typing import Dict, Any, Callable, Awaitable, NamedTuple, Optional
+
+from fastapi import HTTPException
+
+from app.clients.redis_client import get_redis_cache
+from app.clients.tracing import traced, tracer
+from app.models.city_recommendation import CityRecommendationsRequest
+from app.models.google_maps_requests import VenueRequest, WeatherRequest, AirQualityRequest, PollenQualityRequest
+from app.models.travel_recommendation import TravelRecommendationsRequest
+from app.services.coordinate_grid import snap_for
+from app.services.google_maps_service import google_maps_service
+from app.services.qloo_service import qloo_service, QlooService
+
+logger = logging.getLogger(__name__)
+
+
+class ContextLookup(NamedTuple):
+    """One cached context source: the route cache prefix and payload it is keyed by, and how to load it"""
+    prefix: str
+    payload: Dict[str, Any]
+    fetch: Callable[[], Awaitable[Dict[str, Any]]]
+    ttl_seconds: int = 3600
+    # Failures are passed on to the prompt as {"detail": ...} instead of failing the whole generation
+    tolerate_errors: bool = False
+
+
+class ContextService:
+    """
+    Assembles the data Claude prompts are built from by calling the Qloo and Google Maps
+    services in-process. Cache prefixes, keys and TTLs mirror the matching API routes,
+    so both paths share the same Redis entries.
+    """
+
+    @staticmethod
+    async def _cached(lookup: ContextLookup, prefetched: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Same get-or-fetch as the routes: a failed fetch raises so that callers coalesced
+        on the same key (route or context) all see the error and nothing is cached
+        """
+        redis_cache = await get_redis_cache()
+
+        cache_key = redis_cache.generate_cache_key(lookup.prefix, lookup.payload)
+
+        cached = (prefetched or {}).get(cache_key)
+        if cached:
+            return cached
+
+        async def fetch_or_raise():
+            result = await lookup.fetch()
+            if not result.get("success", False):
+                raise HTTPException(status_code=400, detail=result.get("error", "Unknown error"))
+            return result
+
+        try:
+            return await redis_cache.get_or_set(cache_key, fetch_or_raise, ttl_seconds=lookup.ttl_seconds)
+        except HTTPException as e:
+            if lookup.tolerate_errors:
+                return {"detail": e.detail}
+            raise
+
+    async def _resolve(self, lookups: Dict[str, Optional[ContextLookup]]) -> Dict[str, Any]:
+        """
+        Resolve several sources concurrently. Their cache entries are read with one MGET first,
+        only the misses go through get_or_set. A None lookup resolves to "".
+        """
+        redis_cache = await get_redis_cache()
+
+        keys = [
+            redis_cache.generate_cache_key(lookup.prefix, lookup.payload)
+            for lookup in lookups.values() if lookup is not None
+        ]
+        # Keys with a soft TTL need their age checked, which only get_or_set does
+        prefetched = await redis_cache.get_many([key for key in keys if not redis_cache.is_revalidated(key)])
+
+        async def resolve(lookup: Optional[ContextLookup]):
+            if lookup is None:
+                return ""
+            # One span per source, so the waterfall shows which of them the generation waited on
+            with tracer.start_as_current_span(f"context.{lookup.prefix}"):
+                return await self._cached(lookup, prefetched)
+
+        results = await asyncio.gather(*(resolve(lookup) for lookup in lookups.values()))
+        return dict(zip(lookups.keys(), results))
+
+    @staticmethod
+    def cultural_profile_lookup(user_preferences, limit: int = 5) -> ContextLookup:
+        request = TravelRecommendationsRequest(user_preferences=user_preferences, limit=limit)
+
+        async def fetch():
+            preference_dict = QlooService.preference_dict(request.user_preferences)
+            if not preference_dict:
+                return {"success": False, "error": "No user preference provided!"}
+
+            result = await qloo_service.get_recommendations(preference_dict, request.limit)
+            if not result["success"]:
+                return result
+
+            return {
+                "success": True,
+                "data": result,
+            }
+
+        return ContextLookup("qloo_recommendations", request.model_dump(), fetch)
+
+    @staticmethod
+    def recommended_cities_lookup(itinerary_cities, limit: int = 5) -> ContextLookup:
+        request = CityRecommendationsRequest(itinerary_cities=itinerary_cities, limit=limit)
+
+        return ContextLookup(
+            "qloo_recommendation_cities",
+            request.model_dump(),
+            lambda: qloo_service.get_city_recommendations(request.itinerary_cities, request.limit)
+        )
+
+    @staticmethod
+    def nearby_venues_lookup(coordinates: str) -> ContextLookup:
+        request = VenueRequest(coordinates=coordinates)
+
+        return ContextLookup(
+            "venues",
+            request.model_dump(),
+            lambda: google_maps_service.find_venues_near_location(
+                request.coordinates,
+                request.radius,
+                request.max_results
+            )
+        )
+
+    @staticmethod
+    def weather_lookup(coordinates: str, days_ahead: int) -> ContextLookup:
+        request = WeatherRequest(coordinates=snap_for("weather_route", coordinates), days_ahead=days_ahead)
+
+        return ContextLookup(
+            "weather_route",
+            request.model_dump(),
+            lambda: google_maps_service.get_weather_forecast_for_location(
+                request.coordinates,
+                request.days_ahead
+            )
+        )
+
+    @staticmethod
+    def air_quality_lookup(coordinates: str, start_hour: str, end_hour: str, target_date: str) -> ContextLookup:
+        request = AirQualityRequest(coordinates=snap_for("air_quality", coordinates),
+                                    start_hour=start_hour,
+                                    end_hour=end_hour,
+                                    target_date=target_date)
+
+        return ContextLookup(
+            "air_quality",
+            request.model_dump(),
+            lambda: google_maps_service.get_hourly_air_quality_range_for_location(
+                request.coordinates,
+                request.start_hour,
+                request.end_hour,
+                request.target_date
+            ),
+            tolerate_errors=True
+        )
+
+    @staticmethod
+    def pollen_lookup(coordinates: str, target_date: str) -> ContextLookup:
+        request = PollenQualityRequest(coordinates=snap_for("pollen_forecast", coordinates), target_date=target_date)
+
+        return ContextLookup(
+            "pollen_forecast",
+            request.model_dump(),
+            lambda: google_maps_service.get_pollen_forecast_for_location(
+                request.coordinates,
+                str(request.target_date)
+            ),
+            tolerate_errors=True
+        )
+
+    async def get_cultural_profile(self, user_preferences, limit: int = 5) -> Dict[str, Any]:
+        return await self._cached(self.cultural_profile_lookup(user_preferences, limit))
+
+    async def get_recommended_cities(self, itinerary_cities, limit: int = 5) -> Dict[str, Any]:
+        return await self._cached(self.recommended_cities_lookup(itinerary_cities, limit))
+
+    async def get_nearby_venues(self, coordinates: str) -> Dict[str, Any]:
+        return await self._cached(self.nearby_venues_lookup(coordinates))
+
+    async def get_weather(self, coordinates: str, days_ahead: int) -> Dict[str, Any]:
+        return await self._cached(self.weather_lookup(coordinates, days_ahead))
+
+    async def get_air_quality(self, coordinates: str, start_hour: str, end_hour: str, target_date: str) -> Dict[str, Any]:
+        return await self._cached(self.air_quality_lookup(coordinates, start_hour, end_hour, target_date))
+
+    async def get_pollen(self, coordinates: str, target_date: str) -> Dict[str, Any]:
+        return await self._cached(self.pollen_lookup(coordinates, target_date))
+
+    @traced()
+    async def assemble_activity_context(self, user_preferences, coordinates: str, start_time, end_time,
+                                        activity_date: str) -> Dict[str, Any]:
+        """
+        Fetch every independent source of an activity prompt concurrently
+        """
+        target_date = datetime.strptime(activity_date, "%Y-%m-%d").date()
+        days_diff = (target_date - date.today()).days
+
+        return await self._resolve({
+            "cultural_profile": self.cultural_profile_lookup(user_preferences),
+            "nearby_venues": self.nearby_venues_lookup(coordinates),
+            "weather_info": self.weather_lookup(coordinates, days_diff) if days_diff < 4 else None,
+            "air_quality_info": self.air_quality_lookup(coordinates, str(start_time), str(end_time), str(activity_date)),
+            "pollen_info": self.pollen_lookup(coordinates, activity_date),
+        })
+
+    @traced()
+    async def assemble_today_context(self, user_preferences, itinerary_cities) -> Dict[str, Any]:
+        return await self._resolve({
+            "cultural_profile": self.cultural_profile_lookup(user_preferences),
+            "recommended_cities": self.recommended_cities_lookup(itinerary_cities),
+        })
+
+
+context_service = ContextService()
+
+__all__ = ['ContextService', 'ContextLookup', 'context_service']
@@ -0,0 +1,41 @@
+import logging
+import os
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _precision(name: str, default: str) -> Optional[int]:
+    value = os.environ.get(name, default).strip()
+    return int(value) if value and int(value) >= 0 else None
+
+
+# Decimal places kept per endpoint: 2 ~ 1.1 km, 1 ~ 11 km. A negative value disables snapping.
+COORDINATE_PRECISION: Dict[str, Optional[int]] = {
+    "weather_route": _precision("WEATHER_COORDINATE_PRECISION", "2"),
+    "air_quality": _precision("AIR_QUALITY_COORDINATE_PRECISION", "2"),
+    "pollen_forecast": _precision("POLLEN_COORDINATE_PRECISION", "1"),
+}
+
+
+def snap_coordinates(coordinates: str, precision: Optional[int]) -> str:
+    """
+    Snap "lat,lng" to a fixed grid so nearby points share cache entries and upstream calls
+    """
+    if precision is None or not coordinates:
+        return coordinates
+    try:
+        lat, lng = (float(part) for part in coordinates.strip().split(','))
+    except ValueError:
+        # Left untouched so the usual validation reports the bad input
+        return coordinates
+    # Adding 0.0 turns -0.0 into 0.0 so both sides of the equator/meridian share a key
+    lat, lng = round(lat, precision) + 0.0, round(lng, precision) + 0.0
+    return f"{lat:.{precision}f},{lng:.{precision}f}"
+
+
+def snap_for(endpoint: str, coordinates: str) -> str:
+    return snap_coordinates(coordinates, COORDINATE_PRECISION.get(endpoint))
+
+
+__all__ = ['COORDINATE_PRECISION', 'snap_coordinates', 'snap_for']
@@ -0,0 +1,75 @@
+import logging
+import os
+from datetime import date
+from typing import Dict, Any
+
+from app.clients.google_maps_client import GoogleMapsClient
+from app.clients.redis_client import get_redis_cache
+from app.clients.tracing import traced
+
+logger = logging.getLogger(__name__)
+
+WEATHER_FORECAST_DAYS = 10
+POLLEN_FORECAST_DAYS = 5
+FORECAST_TTL = int(os.environ.get("FORECAST_TTL", "3600"))
+
+
+class ForecastStore:
+    """
+    Fetches the full weather (10 days) and pollen (5 days) horizon once per location and day,
+    caches the parsed per-day records and serves any day offset from them
+    """
+
+    def __init__(self, client: GoogleMapsClient):
+        self.client = client
+        self.ttl_seconds = FORECAST_TTL
+
+    async def _days(self, prefix: str, coordinates: str, fetch) -> Dict[str, Any]:
+        redis_cache = await get_redis_cache()
+
+        # Offsets are relative to today, so the horizon is cached per calendar day
+        cache_key = redis_cache.generate_cache_key(prefix, {
+            "coordinates": coordinates.strip(),
+            "date": date.today().isoformat()
+        })
+
+        return await redis_cache.get_or_set(
+            cache_key,
+            fetch,
+            ttl_seconds=self.ttl_seconds,
+            should_cache=lambda result: result.get("success", False)
+        )
+
+    @staticmethod
+    def _day(forecast: Dict[str, Any], offset: int, kind: str) -> Dict[str, Any]:
+        if not forecast.get("success", False):
+            return forecast
+
+        days = forecast.get("days", [])
+        if offset < 0 or offset >= len(days):
+            return {
+                "success": False,
+                "error": f"No {kind} data available {offset} days from today"
+            }
+        return days[offset]
+
+    @traced()
+    async def weather_for_day(self, coordinates: str, days_ahead: int) -> Dict[str, Any]:
+        forecast = await self._days(
+            "weather_days",
+            coordinates,
+            lambda: self.client.get_weather_forecast_days(coordinates, WEATHER_FORECAST_DAYS)
+        )
+        return self._day(forecast, days_ahead, "weather")
+
+    @traced()
+    async def pollen_for_day(self, coordinates: str, days_offset: int) -> Dict[str, Any]:
+        forecast = await self._days(
+            "pollen_days",
+            coordinates,
+            lambda: self.client.get_pollen_forecast_days(coordinates, POLLEN_FORECAST_DAYS)
+        )
+        return self._day(forecast, days_offset, "pollen")
+
+
+__all__ = ['ForecastStore']
@@ -1,16 +1,35 @@
+import asyncio
 import logging
-from typing import Dict, Any
+import os
+from typing import Dict, Any, List, Tuple
 from datetime import timezone, timedelta, date, datetime
 
 from app.clients.google_maps_client import GoogleMapsClient
+from app.clients.redis_client import get_redis_cache
+from app.clients.tracing import traced
+from app.models.google_maps_requests import RoutesRequest, AddressRequest
+from app.services.air_quality_store import AirQualityStore
+from app.services.forecast_store import ForecastStore
 
 logger = logging.getLogger(__name__)
 
+# computeRouteMatrix limits: elements per request (TRANSIT is stricter) and waypoints per request
+ROUTE_MATRIX_MAX_ELEMENTS = 625
+ROUTE_MATRIX_MAX_TRANSIT_ELEMENTS = 100
+ROUTE_MATRIX_MAX_WAYPOINTS = 50
+ROUTE_CACHE_TTL = 3600
+
+GEOCODE_CACHE_TTL = 3600
+GEOCODE_BATCH_CONCURRENCY = int(os.environ.get("GEOCODE_BATCH_CONCURRENCY", "8"))
+
 
 class GoogleMapsService:
     def __init__(self):
         self.client = GoogleMapsClient()
+        self.forecasts = ForecastStore(self.client)
+        self.air_quality = AirQualityStore(self.client)
 
+    @traced()
     async def find_venues_near_location(self, coordinates: str, radius: float = 10000.0, max_results: int = 20) -> Dict[str, Any]:
         try:
 
@@ -42,6 +61,7 @@ class GoogleMapsService:
                 "venues": []
             }
 
+    @traced()
     async def calculate_route_between_addresses(self, start_address: str, end_address: str, travel_mode: str = "WALK") -> Dict[str, Any]:
         try:
             if not start_address or not start_address.strip():
@@ -77,6 +97,143 @@ class GoogleMapsService:
                 "error": "Internal service error while calculating route"
             }
 
+    @staticmethod
+    def _route_matrix_chunks(origins: List[str], destinations: List[str],
+                             travel_mode: str) -> List[Tuple[List[str], List[str]]]:
+        """Split origins x destinations into blocks within the matrix API element and waypoint limits"""
+        max_elements = ROUTE_MATRIX_MAX_TRANSIT_ELEMENTS if travel_mode == "TRANSIT" else ROUTE_MATRIX_MAX_ELEMENTS
+        destination_size = min(len(destinations), ROUTE_MATRIX_MAX_WAYPOINTS // 2)
+        origin_size = max(1, min(ROUTE_MATRIX_MAX_WAYPOINTS - destination_size, max_elements // destination_size))
+
+        return [
+            (origins[i:i + origin_size], destinations[j:j + destination_size])
+            for i in range(0, len(origins), origin_size)
+            for j in range(0, len(destinations), destination_size)
+        ]
+
+    @staticmethod
+    def _route_cache_key(redis_cache, start_address: str, end_address: str, travel_mode: str) -> str:
+        """Same key /routes uses, so single routes and matrix cells share cache entries"""
+        request = RoutesRequest(start_address=start_address, end_address=end_address, travel_mode=travel_mode)
+        return redis_cache.generate_cache_key("routes", request.model_dump())
+
+    @traced()
+    async def calculate_route_matrix(self, origins: List[str], destinations: List[str],
+                                     travel_mode: str = "WALK") -> Dict[str, Any]:
+        try:
+            origins = [origin.strip() if origin else "" for origin in origins]
+            destinations = [destination.strip() if destination else "" for destination in destinations]
+
+            if not origins or not all(origins):
+                return {
+                    "success": False,
+                    "error": "Origins cannot be empty"
+                }
+
+            if not destinations or not all(destinations):
+                return {
+                    "success": False,
+                    "error": "Destinations cannot be empty"
+                }
+
+            travel_mode = travel_mode.upper()
+            valid_modes = ["WALK", "DRIVE", "BICYCLE", "TRANSIT"]
+            if travel_mode not in valid_modes:
+                return {
+                    "success": False,
+                    "error": f"Invalid travel mode '{travel_mode}'. Must be one of: {', '.join(valid_modes)}"
+                }
+
+            redis_cache = await get_redis_cache()
+
+            pairs = list(dict.fromkeys(
+                (origin, destination)
+                for origin in origins
+                for destination in destinations
+                if origin != destination
+            ))
+            keys = {pair: self._route_cache_key(redis_cache, pair[0], pair[1], travel_mode) for pair in pairs}
+
+            cached = await redis_cache.get_many(list(keys.values()))
+            routes = {}
+            for pair in pairs:
+                route = cached[keys[pair]]
+                if route and route.get("success"):
+                    routes[pair] = route
+
+            missing = [pair for pair in pairs if pair not in routes]
+            if missing:
+                routes.update(await self._fetch_route_matrix(redis_cache, missing, keys, travel_mode))
+
+            def cell(origin: str, destination: str, field: str):
+                if origin == destination:
+                    return 0
+                route = routes.get((origin, destination))
+                return route[field] if route else None
+
+            return {
+                "success": True,
+                "travel_mode": travel_mode,
+                "origins": origins,
+                "destinations": destinations,
+                "duration_minutes": [[cell(origin, destination, "duration_minutes") for destination in destinations]
+                                     for origin in origins],
+                "distance_km": [[cell(origin, destination, "distance_km") for destination in destinations]
+                                for origin in origins],
+                "cached_pairs": len(pairs) - len(missing),
+                "fetched_pairs": len(missing)
+            }
+
+        except Exception as e:
+            logger.error(f"Service error calculating route matrix: {str(e)}")
+            return {
+                "success": False,
+                "error": "Internal service error while calculating route matrix"
+            }
+
+    async def _fetch_route_matrix(self, redis_cache, missing: List[Tuple[str, str]], keys: Dict[Tuple[str, str], str],
+                                  travel_mode: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+        """
+        Fetch the uncached pairs through computeRouteMatrix and write every route found back
+        under its /routes cache key, in the same shape calculate_route returns
+        """
+        missing_set = set(missing)
+        origins = list(dict.fromkeys(origin for origin, _ in missing))
+        destinations = list(dict.fromkeys(destination for _, destination in missing))
+        chunks = self._route_matrix_chunks(origins, destinations, travel_mode)
+
+        results = await asyncio.gather(*(
+            self.client.compute_route_matrix(chunk_origins, chunk_destinations, travel_mode)
+            for chunk_origins, chunk_destinations in chunks
+        ))
+
+        routes = {}
+        for (chunk_origins, chunk_destinations), elements in zip(chunks, results):
+            for element in elements:
+                if element.get("condition") != "ROUTE_EXISTS":
+                    continue
+
+                pair = (chunk_origins[element.get("originIndex", 0)],
+                        chunk_destinations[element.get("destinationIndex", 0)])
+                if pair not in missing_set:
+                    continue
+
+                duration_info = int(element.get("duration", "0s").rstrip('s'))
+                distance_info = int(element.get("distanceMeters", 0))
+
+                routes[pair] = {
+                    "success": True,
+                    "start_address": pair[0],
+                    "end_address": pair[1],
+                    "travel_mode": travel_mode,
+                    "duration_minutes": duration_info // 60,
+                    "distance_km": round(distance_info / 1000, 2)
+                }
+
+        await redis_cache.set_many({keys[pair]: route for pair, route in routes.items()}, ttl_seconds=ROUTE_CACHE_TTL)
+        return routes
+
+    @traced()
     async def convert_address_in_coordinates(self, address):
         try:
             if not address or not address.strip():
@@ -102,6 +259,76 @@ class GoogleMapsService:
                 "error": "Internal service error while geocoding address"
             }
 
+    @staticmethod
+    def normalize_address(address: str) -> str:
+        return " ".join(address.split()) if address else ""
+
+    @traced()
+    async def convert_addresses_in_coordinates(self, addresses: List[str]) -> Dict[str, Any]:
+        """
+        Geocode many addresses: cached ones come from Redis in one round trip, the rest are
+        resolved concurrently (bounded) and cached under the same keys /geocode-route uses
+        """
+        try:
+            normalized = [self.normalize_address(address) for address in addresses]
+
+            # One lookup per address regardless of case or spacing; the first spelling seen is used
+            unique: Dict[str, str] = {}
+            for address in normalized:
+                if address:
+                    unique.setdefault(address.lower(), address)
+
+            redis_cache = await get_redis_cache()
+            keys = {
+                dedup_key: redis_cache.generate_cache_key("geocode_route", AddressRequest(address=address).model_dump())
+                for dedup_key, address in unique.items()
+            }
+
+            cached = await redis_cache.get_many(list(keys.values()))
+            results = {dedup_key: cached[key] for dedup_key, key in keys.items() if cached[key]}
+
+            missing = [dedup_key for dedup_key in unique if dedup_key not in results]
+            semaphore = asyncio.Semaphore(GEOCODE_BATCH_CONCURRENCY)
+
+            async def resolve(dedup_key: str) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self.convert_address_in_coordinates(unique[dedup_key])
+
+            for dedup_key, result in zip(missing, await asyncio.gather(*(resolve(key) for key in missing))):
+                results[dedup_key] = result
+
+            await redis_cache.set_many(
+                {keys[dedup_key]: results[dedup_key] for dedup_key in missing if results[dedup_key]["success"]},
+                ttl_seconds=GEOCODE_CACHE_TTL
+            )
+
+            items = []
+            for address, normalized_address in zip(addresses, normalized):
+                if not normalized_address:
+                    items.append({"address": address, "success": False, "error": "Address cannot be empty"})
+                    continue
+
+                result = results[normalized_address.lower()]
+                if result.get("success"):
+                    items.append({"address": address, **result})
+                else:
+                    items.append({"address": address, "success": False, "error": result.get("error", "Unknown error")})
+
+            return {
+                "success": True,
+                "results": items,
+                "cached": len(unique) - len(missing),
+                "resolved": len(missing)
+            }
+
+        except Exception as e:
+            logger.error(f"Service error geocoding address batch: {str(e)}")
+            return {
+                "success": False,
+                "error": "Internal service error while geocoding addresses"
+            }
+
+    @traced()
     async def check_if_location_is_city(self, city_name):
         result = await self.client.geocode_address(city_name)
 
@@ -137,6 +364,7 @@ class GoogleMapsService:
             "city": False
         }
 
+    @traced()
     async def get_weather_forecast_for_location(self, coordinates: str, days_ahead: int = 0) -> Dict[str, Any]:
 
         try:
@@ -152,7 +380,7 @@ class GoogleMapsService:
                     "error": "Days ahead must be between 0 (today) and 9"
                 }
 
-            weather_result = await self.client.get_weather_forecast(
+            weather_result = await self.forecasts.weather_for_day(
                 coordinates=coordinates,
                 days_ahead=days_ahead
             )
@@ -165,6 +393,7 @@ class GoogleMapsService:
                 "error": "Internal service error while getting weather forecast"
             }
 
+    @traced()
     async def get_hourly_air_quality_range_for_location(self, coordinates: str, start_hour: str, end_hour: str,
                                                         target_date: str) -> Dict[str, Any]:
 
@@ -197,11 +426,10 @@ class GoogleMapsService:
                     "error": "Coordinates cannot be empty"
                 }
 
-            air_quality = await self.client.get_hourly_air_quality_range(
+            air_quality = await self.air_quality.hourly_range(
                 coordinates=coordinates,
                 start_datetime=start_datetime,
-                end_datetime=end_datetime,
-                target_date=target_date
+                end_datetime=end_datetime
             )
 
             return air_quality
@@ -213,6 +441,7 @@ class GoogleMapsService:
                 "error": "Internal service error while getting weather forecast"
             }
 
+    @traced()
     async def get_pollen_forecast_for_location(self, coordinates: str, target_date: str) -> Dict[str, Any]:
 
         try:
@@ -243,7 +472,7 @@ class GoogleMapsService:
                     "error": f"Target date {target_date} is too far in the future. Maximum date available is {max_date}."
                 }
 
-            air_quality = await self.client.get_pollen_forecast(
+            air_quality = await self.forecasts.pollen_for_day(
                 coordinates=coordinates,
                 days_offset=days_from_today
             )
@@ -0,0 +1,68 @@
+import json
+import logging
+from typing import Any, Dict, List
+
+logger = logging.getLogger(__name__)
+
+
+class OptionStreamParser:
+    """
+    Incremental parser for Claude's {"options": [{...}, {...}]} answers.
+    Text is fed in chunks as it streams and every option object is returned
+    as soon as its closing brace arrives.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.position = 0
+        self.stack: List[str] = []
+        self.in_string = False
+        self.escaped = False
+        self.option_start = -1
+        self.options: List[Dict[str, Any]] = []
+
+    def feed(self, text: str) -> List[Dict[str, Any]]:
+        self.buffer += text
+        completed = []
+
+        while self.position < len(self.buffer):
+            char = self.buffer[self.position]
+
+            if self.in_string:
+                if self.escaped:
+                    self.escaped = False
+                elif char == "\\":
+                    self.escaped = True
+                elif char == '"':
+                    self.in_string = False
+            elif char == '"' and self.stack:
+                self.in_string = True
+            elif char in "{[":
+                # An object directly inside the array of the root object is an option
+                if char == "{" and self.stack == ["{", "["]:
+                    self.option_start = self.position
+                self.stack.append(char)
+            elif char in "}]" and self.stack:
+                self.stack.pop()
+                if char == "}" and self.stack == ["{", "["] and self.option_start >= 0:
+                    option = self._parse_option(self.buffer[self.option_start:self.position + 1])
+                    if option is not None:
+                        self.options.append(option)
+                        completed.append(option)
+                    self.option_start = -1
+
+            self.position += 1
+
+        return completed
+
+    @staticmethod
+    def _parse_option(raw: str):
+        try:
+            option = json.loads(raw)
+        except json.JSONDecodeError:
+            logger.warning(f"Skipping option that is not valid JSON: {raw[:200]}")
+            return None
+        return option if isinstance(option, dict) else None
+
+
+__all__ = ['OptionStreamParser']
@@ -2,18 +2,38 @@ import asyncio
 from typing import List, Dict, Any
 
 from app.clients.qloo_client import QlooClient
+from app.clients.tracing import traced
+from app.models.user_preferences import UserPreferences
 
 
 class QlooService:
     def __init__(self):
         self.client = QlooClient()
 
+    @staticmethod
+    def preference_dict(user_preferences: UserPreferences) -> Dict[str, List[str]]:
+        """Map the request preferences to the categories used by get_recommendations, dropping empty ones"""
+        preference_dict = {
+            "artists": user_preferences.artists,
+            "books": user_preferences.books,
+            "movies": user_preferences.movies,
+            "brands": user_preferences.brands,
+            "video_games": user_preferences.video_games,
+            "tv_shows": user_preferences.tv_shows,
+            "podcasts": user_preferences.podcasts,
+            "persons": user_preferences.persons,
+        }
+
+        return {k: v for k, v in preference_dict.items() if v}
+
+    @traced()
     async def search_entity(self, query: str, type: str, limit: int):
         try:
             return await self.client.search_entities(query, type, limit)
         except Exception as e:
             return []
 
+    @traced()
     async def get_city_recommendations(self, itinerary_cities: List[str], limits: int):
         try:
 
@@ -55,6 +75,7 @@ class QlooService:
             }
 
 
+    @traced()
     async def get_recommendations(self, user_preferences: Dict[str, List[str]], limits: int) -> Dict[str, Any]:
         try:
             results = {
@@ -0,0 +1,65 @@
+"""
+Compare two benchmark result files and flag regressions.
+
+    python -m benchmarks.compare benchmarks/results/<before>.json benchmarks/results/<after>.json --threshold 10
+
+Exits with status 1 when any latency percentile grows, or throughput drops, by more than the threshold (percent).
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Any, Dict
+
+# Metric and whether a higher value is better
+METRICS = [("p50_ms", False), ("p95_ms", False), ("p99_ms", False), ("throughput_rps", True)]
+
+
+def change(before: float, after: float) -> float:
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def compare(before: Dict[str, Any], after: Dict[str, Any], threshold: float) -> int:
+    regressions = 0
+    print(f"before {before['meta']['commit']} ({before['meta']['timestamp']})  "
+          f"after {after['meta']['commit']} ({after['meta']['timestamp']})")
+
+    for scenario, phases in after["results"].items():
+        if scenario not in before["results"]:
+            print(f"{scenario:<26} new scenario")
+            continue
+
+        for phase, stats in phases.items():
+            old_stats = before["results"][scenario].get(phase)
+            if not old_stats:
+                continue
+
+            cells = []
+            for metric, higher_is_better in METRICS:
+                delta = change(old_stats[metric], stats[metric])
+                regressed = -delta > threshold if higher_is_better else delta > threshold
+                regressions += regressed
+                cells.append(f"{metric} {old_stats[metric]:>9.1f} -> {stats[metric]:>9.1f} "
+                             f"({delta:+6.1f}%){' !' if regressed else '  '}")
+            print(f"{scenario:<26} {phase:<5} " + "  ".join(cells))
+
+    print(f"{regressions} regression(s) above {threshold}%")
+    return 1 if regressions else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed change in percent")
+    args = parser.parse_args()
+
+    before = json.loads(Path(args.before).read_text())
+    after = json.loads(Path(args.after).read_text())
+    sys.exit(compare(before, after, args.threshold))
+
+
+if __name__ == "__main__":
+    main()
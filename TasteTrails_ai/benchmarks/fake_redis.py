@@ -0,0 +1,141 @@
+import time
+from typing import Any, Dict, List, Optional
+
+
+def _encode(value: Any) -> bytes:
+    # Same value encoding as redis-py
+    if isinstance(value, bytes):
+        return value
+    return str(value).encode("utf-8")
+
+
+class FakePipeline:
+    """Queues commands and runs them against the FakeRedis on execute(), like a non-transactional pipeline"""
+
+    def __init__(self, redis: "FakeRedis"):
+        self.redis = redis
+        self.commands: List[tuple] = []
+
+    def __getattr__(self, name: str):
+        def queue(*args, **kwargs):
+            self.commands.append((name, args, kwargs))
+            return self
+        return queue
+
+    async def execute(self) -> List[Any]:
+        self.redis.round_trips += 1
+        commands, self.commands = self.commands, []
+        return [await getattr(self.redis, name)(*args, _counted=False, **kwargs) for name, args, kwargs in commands]
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        self.commands = []
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the subset of redis.asyncio.Redis (decode_responses=False) the cache uses.
+    Counts round trips so benchmarks can report Redis traffic next to latency.
+    """
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+        self.expires: Dict[str, float] = {}
+        self.round_trips = 0
+
+    def _alive(self, key: str) -> bool:
+        expires_at = self.expires.get(key)
+        if expires_at is not None and expires_at <= time.monotonic():
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return key in self.data
+
+    def _count(self, counted: bool) -> None:
+        if counted:
+            self.round_trips += 1
+
+    def flushall(self) -> None:
+        self.data.clear()
+        self.expires.clear()
+
+    async def get(self, key: str, _counted: bool = True) -> Optional[bytes]:
+        self._count(_counted)
+        return self.data.get(key) if self._alive(key) else None
+
+    async def mget(self, keys: List[str], *args, _counted: bool = True) -> List[Optional[bytes]]:
+        self._count(_counted)
+        keys = list(keys) + list(args)
+        return [self.data.get(key) if self._alive(key) else None for key in keys]
+
+    async def set(self, key: str, value: Any, ex: Optional[int] = None, px: Optional[int] = None,
+                  nx: bool = False, _counted: bool = True) -> Optional[bool]:
+        self._count(_counted)
+        if nx and self._alive(key):
+            return None
+        self.data[key] = _encode(value)
+        self.expires.pop(key, None)
+        if ex is not None:
+            self.expires[key] = time.monotonic() + ex
+        elif px is not None:
+            self.expires[key] = time.monotonic() + px / 1000
+        return True
+
+    async def pttl(self, key: str, _counted: bool = True) -> int:
+        self._count(_counted)
+        if not self._alive(key):
+            return -2
+        if key not in self.expires:
+            return -1
+        return int((self.expires[key] - time.monotonic()) * 1000)
+
+    async def ttl(self, key: str, _counted: bool = True) -> int:
+        remaining = await self.pttl(key, _counted=_counted)
+        return remaining if remaining < 0 else remaining // 1000
+
+    async def expire(self, key: str, seconds: int, _counted: bool = True) -> bool:
+        self._count(_counted)
+        if not self._alive(key):
+            return False
+        self.expires[key] = time.monotonic() + seconds
+        return True
+
+    async def delete(self, *keys: str, _counted: bool = True) -> int:
+        self._count(_counted)
+        deleted = 0
+        for key in keys:
+            if self._alive(key):
+                deleted += 1
+            self.data.pop(key, None)
+            self.expires.pop(key, None)
+        return deleted
+
+    async def hmget(self, key: str, fields: List[str], *args, _counted: bool = True) -> List[Optional[bytes]]:
+        self._count(_counted)
+        fields = list(fields) + list(args)
+        hash_value = self.data.get(key, {}) if self._alive(key) else {}
+        return [hash_value.get(_encode(field)) for field in fields]
+
+    async def hset(self, key: str, field: Any = None, value: Any = None,
+                   mapping: Optional[Dict[Any, Any]] = None, _counted: bool = True) -> int:
+        self._count(_counted)
+        self._alive(key)
+        hash_value = self.data.setdefault(key, {})
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        added = 0
+        for item_field, item_value in items.items():
+            added += _encode(item_field) not in hash_value
+            hash_value[_encode(item_field)] = _encode(item_value)
+        return added
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def aclose(self) -> None:
+        pass
+
+
+__all__ = ['FakeRedis']
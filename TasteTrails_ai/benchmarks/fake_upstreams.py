@@ -0,0 +1,246 @@
+import asyncio
+import json
+import math
+import random
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+import httpx
+
+QLOO_HOST = "qloo.bench"
+
+# Upstream each fake host stands in for; latency and errors are configured per upstream
+UPSTREAM_HOSTS = {
+    QLOO_HOST: "qloo",
+    "places.googleapis.com": "google",
+    "routes.googleapis.com": "google",
+    "maps.googleapis.com": "google",
+    "weather.googleapis.com": "google",
+    "airquality.googleapis.com": "google",
+    "pollen.googleapis.com": "google",
+    "api.anthropic.com": "anthropic",
+}
+
+
+@dataclass
+class LatencyProfile:
+    """Log-normal latency around `median` seconds, and the share of calls answered with a 503"""
+    median: float
+    sigma: float = 0.4
+    error_rate: float = 0.0
+
+    def sample(self, rng: random.Random) -> float:
+        return self.median * math.exp(rng.gauss(0.0, self.sigma))
+
+
+class FakeUpstreams:
+    """
+    Serves Qloo, Google Maps Platform and Anthropic responses shaped like the real APIs,
+    through an httpx.MockTransport, with latency and error rates drawn per upstream
+    """
+
+    def __init__(self, profiles: Dict[str, LatencyProfile], seed: int = 0):
+        self.profiles = profiles
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def reset_counters(self) -> None:
+        self.calls.clear()
+        self.errors.clear()
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        upstream = UPSTREAM_HOSTS.get(request.url.host)
+        if upstream is None:
+            return httpx.Response(404, json={"error": f"No fake for {request.url.host}"})
+
+        profile = self.profiles[upstream]
+        self.calls[upstream] += 1
+        await asyncio.sleep(profile.sample(self.rng))
+
+        if self.rng.random() < profile.error_rate:
+            self.errors[upstream] += 1
+            return httpx.Response(503, json={"error": "fake upstream error"})
+
+        handler = getattr(self, f"_{upstream}")
+        return handler(request)
+
+    # Qloo
+
+    def _qloo(self, request: httpx.Request) -> httpx.Response:
+        params = request.url.params
+        if request.url.path.endswith("/search"):
+            query = params.get("query", "")
+            return httpx.Response(200, json={"results": [
+                {"entity_id": f"entity-{query.lower()}", "name": query}
+            ]})
+
+        entity_ids = params.get_list("entity_ids")
+        take = int(params.get("take", "5"))
+        return httpx.Response(200, json={"results": [
+            {
+                "entity_id": f"rec-{entity_ids[index % max(len(entity_ids), 1)]}-{index}",
+                "name": f"Recommendation {index} for {entity_ids[index % max(len(entity_ids), 1)]}",
+                "query": {"affinity": round(0.99 - index * 0.01, 2)},
+                "popularity": 0.5,
+                "tags": [{"type": "urn:tag:genre", "name": "Indie"}],
+                "properties": {},
+            }
+            for index in range(take)
+        ]})
+
+    # Google Maps Platform
+
+    def _google(self, request: httpx.Request) -> httpx.Response:
+        host, path = request.url.host, request.url.path
+        if host == "places.googleapis.com":
+            return self._places(request)
+        if path.endswith(":computeRoutes"):
+            return httpx.Response(200, json={"routes": [{"duration": "900s", "distanceMeters": 1200}]})
+        if path.endswith(":computeRouteMatrix"):
+            return self._route_matrix(request)
+        if host == "maps.googleapis.com":
+            return self._geocode()
+        if host == "weather.googleapis.com":
+            return self._weather(request)
+        if host == "airquality.googleapis.com":
+            return self._air_quality(request)
+        if host == "pollen.googleapis.com":
+            return self._pollen(request)
+        return httpx.Response(404, json={"error": f"No fake for {host}{path}"})
+
+    @staticmethod
+    def _places(request: httpx.Request) -> httpx.Response:
+        max_results = json.loads(request.content).get("maxResultCount", 20)
+        return httpx.Response(200, json={"places": [
+            {
+                "id": f"place-{index}",
+                "displayName": {"text": f"Venue {index}"},
+                "formattedAddress": f"{index} Bench Street",
+                "rating": round(3.5 + (index % 15) / 10, 1),
+                "types": ["museum", "tourist_attraction", "point_of_interest"],
+            }
+            for index in range(max_results)
+        ]})
+
+    @staticmethod
+    def _route_matrix(request: httpx.Request) -> httpx.Response:
+        body = json.loads(request.content)
+        return httpx.Response(200, json=[
+            {
+                "originIndex": origin,
+                "destinationIndex": destination,
+                "duration": f"{300 + 60 * (origin + destination)}s",
+                "distanceMeters": 400 + 100 * (origin + destination),
+                "status": {},
+                "condition": "ROUTE_EXISTS",
+            }
+            for origin in range(len(body["origins"]))
+            for destination in range(len(body["destinations"]))
+        ])
+
+    @staticmethod
+    def _geocode() -> httpx.Response:
+        location = {"lat": 48.1372, "lng": 11.5756}
+        return httpx.Response(200, json={"results": [{
+            "types": ["locality", "political"],
+            "geometry": {
+                "location": location,
+                "bounds": {
+                    "northeast": {"lat": 48.2482, "lng": 11.7229},
+                    "southwest": {"lat": 48.0616, "lng": 11.3607},
+                },
+            },
+        }]})
+
+    @staticmethod
+    def _weather(request: httpx.Request) -> httpx.Response:
+        days = int(request.url.params.get("days", "1"))
+        today = datetime.utcnow().date()
+        return httpx.Response(200, json={"forecastDays": [
+            {
+                "displayDate": {"year": day.year, "month": day.month, "day": day.day},
+                "maxTemperature": {"degrees": 24.5, "unit": "CELSIUS"},
+                "minTemperature": {"degrees": 14.1, "unit": "CELSIUS"},
+                "feelsLikeMaxTemperature": {"degrees": 25.0, "unit": "CELSIUS"},
+                "feelsLikeMinTemperature": {"degrees": 13.2, "unit": "CELSIUS"},
+                "daytimeForecast": {
+                    "weatherCondition": {"type": "PARTLY_CLOUDY", "description": {"text": "Partly cloudy"}},
+                    "relativeHumidity": 55,
+                    "uvIndex": 5,
+                    "precipitation": {"probability": {"percent": 10, "type": "RAIN"},
+                                      "qpf": {"quantity": 0, "unit": "MILLIMETERS"}},
+                    "thunderstormProbability": 0,
+                    "wind": {"speed": {"value": 12, "unit": "KILOMETERS_PER_HOUR"},
+                             "direction": {"cardinal": "WEST"}},
+                    "cloudCover": 40,
+                },
+                "nighttimeForecast": {"weatherCondition": {"type": "CLEAR"}},
+            }
+            for day in (today + timedelta(days=offset) for offset in range(days))
+        ]})
+
+    @staticmethod
+    def _air_quality(request: httpx.Request) -> httpx.Response:
+        period = json.loads(request.content)["period"]
+        hour = datetime.fromisoformat(period["startTime"])
+        end = datetime.fromisoformat(period["endTime"])
+
+        forecasts: List[Dict[str, Any]] = []
+        while hour <= end:
+            forecasts.append({
+                "dateTime": hour.isoformat().replace("+00:00", "Z"),
+                "indexes": [{"code": "uaqi", "aqi": 40 + hour.hour}],
+            })
+            hour += timedelta(hours=1)
+        return httpx.Response(200, json={"hourlyForecasts": forecasts})
+
+    @staticmethod
+    def _pollen(request: httpx.Request) -> httpx.Response:
+        days = int(request.url.params.get("days", "1"))
+        today = datetime.utcnow().date()
+        return httpx.Response(200, json={"dailyInfo": [
+            {
+                "date": {"year": day.year, "month": day.month, "day": day.day},
+                "pollenTypeInfo": [
+                    {"code": code, "inSeason": True, "indexInfo": {"value": value, "category": "Low"}}
+                    for code, value in (("GRASS", 2), ("TREE", 1), ("WEED", 0))
+                ],
+                "plantInfo": [
+                    {"code": "BIRCH", "displayName": "Birch", "inSeason": True, "indexInfo": {"value": 1}}
+                ],
+            }
+            for day in (today + timedelta(days=offset) for offset in range(days))
+        ]})
+
+    # Anthropic
+
+    def _anthropic(self, request: httpx.Request) -> httpx.Response:
+        text = json.dumps({"options": [
+            {
+                "name": f"Option {index}",
+                "description": "A walk through the old town, its galleries and a riverside cafe",
+                "location": "Old Town",
+                "duration": "2 hours",
+                "reasoning": "Matches the cultural profile and the weather",
+            }
+            for index in range(3)
+        ]})
+
+        if not json.loads(request.content).get("stream"):
+            return httpx.Response(200, json={"content": [{"type": "text", "text": text}]})
+
+        # Streamed as a handful of text deltas, like the Messages streaming API
+        chunks = [text[i:i + 64] for i in range(0, len(text), 64)]
+        events = [{"type": "content_block_delta", "delta": {"type": "text_delta", "text": chunk}} for chunk in chunks]
+        events.append({"type": "message_stop"})
+        body = "".join(f"event: {event['type']}\ndata: {json.dumps(event)}\n\n" for event in events)
+        return httpx.Response(200, content=body.encode("utf-8"), headers={"Content-Type": "text/event-stream"})
+
+
+__all__ = ['FakeUpstreams', 'LatencyProfile', 'QLOO_HOST']
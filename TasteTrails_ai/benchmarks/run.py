@@ -0,0 +1,214 @@
+"""
+Benchmarks the AI service in-process against fake upstreams and an in-memory Redis,
+so no Qloo, Google or Anthropic quota is used.
+
+Every scenario runs a cold phase (empty caches, distinct requests) and then a warm phase
+(the same requests again) and reports p50/p95/p99 latency and throughput for each.
+
+    cd TasteTrails_ai
+    python -m benchmarks.run --requests 50 --concurrency 10
+    python -m benchmarks.run --scenarios google_venues,claude_generate_options --latency anthropic=4
+    python -m benchmarks.compare benchmarks/results/<before>.json benchmarks/results/<after>.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import subprocess
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from benchmarks.fake_redis import FakeRedis
+from benchmarks.fake_upstreams import FakeUpstreams, LatencyProfile, QLOO_HOST
+from benchmarks.scenarios import SCENARIOS, Scenario
+
+RESULTS_DIR = Path(__file__).parent / "results"
+
+DEFAULT_LATENCY = {"qloo": 0.15, "google": 0.08, "anthropic": 1.5}
+
+
+def parse_upstream_settings(value: str, defaults: Dict[str, float]) -> Dict[str, float]:
+    """Parse "upstream=value,upstream=value" on top of the defaults"""
+    settings = dict(defaults)
+    for item in value.split(","):
+        if "=" in item:
+            upstream, number = item.split("=", 1)
+            settings[upstream.strip()] = float(number)
+    return settings
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile"""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(p / 100 * len(sorted_values) + 0.5)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def configure_environment() -> None:
+    # Set before the app is imported: clients read their configuration at import time
+    os.environ.setdefault("QLOO_BASE_URL", f"https://{QLOO_HOST}")
+    os.environ.setdefault("QLOO_API_KEY", "bench")
+    os.environ.setdefault("GOOGLE_MAPS_API_KEY", "bench")
+    os.environ.setdefault("ANTHROPIC_API_KEY", "bench")
+    os.environ.setdefault("REDIS_HOST", "localhost")
+    os.environ.setdefault("REDIS_PORT", "6379")
+
+
+class Bench:
+    def __init__(self, args: argparse.Namespace):
+        self.args = args
+        latency = parse_upstream_settings(args.latency, DEFAULT_LATENCY)
+        errors = parse_upstream_settings(args.errors, {upstream: 0.0 for upstream in DEFAULT_LATENCY})
+        self.profiles = {
+            upstream: LatencyProfile(median=latency[upstream], sigma=args.sigma, error_rate=errors[upstream])
+            for upstream in DEFAULT_LATENCY
+        }
+        self.upstreams = FakeUpstreams(self.profiles, seed=args.seed)
+        self.redis = FakeRedis()
+
+    async def setup(self) -> None:
+        from app.clients import redis_client
+        from app.clients.http_client import http_clients
+        from app.main import app
+
+        redis_client.redis_client = self.redis
+        http_clients.transport = self.upstreams.transport()
+        self.http_clients = http_clients
+        self.cache = await redis_client.get_redis_cache()
+        self.client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench",
+                                        timeout=120.0)
+
+    async def teardown(self) -> None:
+        await self.client.aclose()
+        await self.http_clients.close()
+
+    def flush_caches(self) -> None:
+        from app.clients.redis_client import LocalCache
+
+        self.redis.flushall()
+        if self.cache.local is not None:
+            self.cache.local = LocalCache()
+
+    async def run_phase(self, scenario: Scenario, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        semaphore = asyncio.Semaphore(self.args.concurrency)
+        latencies: List[float] = []
+        statuses: Dict[str, int] = {}
+
+        async def send(payload: Dict[str, Any]) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    response = await self.client.request(scenario.method, scenario.path, json=payload)
+                    status = str(response.status_code)
+                except Exception as e:
+                    status = type(e).__name__
+                latencies.append(time.perf_counter() - started)
+                statuses[status] = statuses.get(status, 0) + 1
+
+        self.upstreams.reset_counters()
+        redis_round_trips = self.redis.round_trips
+        started = time.perf_counter()
+        await asyncio.gather(*(send(payload) for payload in payloads))
+        wall = time.perf_counter() - started
+
+        latencies.sort()
+        return {
+            "requests": len(payloads),
+            "errors": sum(count for status, count in statuses.items() if not status.startswith("2")),
+            "statuses": statuses,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+            "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2) if latencies else 0.0,
+            "throughput_rps": round(len(payloads) / wall, 2) if wall else 0.0,
+            "wall_seconds": round(wall, 3),
+            "upstream_calls": dict(self.upstreams.calls),
+            "upstream_errors": dict(self.upstreams.errors),
+            "redis_round_trips": self.redis.round_trips - redis_round_trips,
+        }
+
+    async def run(self, scenarios: List[Scenario]) -> Dict[str, Any]:
+        await self.setup()
+        results = {}
+        try:
+            for scenario in scenarios:
+                payloads = [scenario.payload(i) for i in range(self.args.requests)]
+                self.flush_caches()
+                cold = await self.run_phase(scenario, payloads)
+                warm = await self.run_phase(scenario, payloads)
+                results[scenario.name] = {"cold": cold, "warm": warm}
+                print_scenario(scenario.name, results[scenario.name])
+        finally:
+            await self.teardown()
+
+        return {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                "python": platform.python_version(),
+                "requests": self.args.requests,
+                "concurrency": self.args.concurrency,
+                "seed": self.args.seed,
+                "upstreams": {upstream: vars(profile) for upstream, profile in self.profiles.items()},
+            },
+            "results": results,
+        }
+
+
+def print_scenario(name: str, phases: Dict[str, Dict[str, Any]]) -> None:
+    for phase, stats in phases.items():
+        print(f"{name:<26} {phase:<5} p50 {stats['p50_ms']:>9.1f} ms  p95 {stats['p95_ms']:>9.1f} ms  "
+              f"p99 {stats['p99_ms']:>9.1f} ms  {stats['throughput_rps']:>8.1f} req/s  "
+              f"errors {stats['errors']:>3}  upstream {sum(stats['upstream_calls'].values()):>4}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=50, help="distinct requests per scenario and phase")
+    parser.add_argument("--concurrency", type=int, default=10, help="requests in flight at once")
+    parser.add_argument("--scenarios", default="", help="comma separated scenario names (default: all)")
+    parser.add_argument("--latency", default="", help="median upstream latency in seconds, e.g. qloo=0.2,anthropic=3")
+    parser.add_argument("--errors", default="", help="upstream 503 rate, e.g. qloo=0.05")
+    parser.add_argument("--sigma", type=float, default=0.4, help="log-normal spread of upstream latency")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="", help="result file (default: benchmarks/results/<time>-<commit>.json)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    configure_environment()
+
+    selected = {name.strip() for name in args.scenarios.split(",") if name.strip()}
+    unknown = selected - {scenario.name for scenario in SCENARIOS}
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+    scenarios = [scenario for scenario in SCENARIOS if not selected or scenario.name in selected]
+
+    report = asyncio.run(Bench(args).run(scenarios))
+
+    if args.output:
+        output = Path(args.output)
+    else:
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+        output = RESULTS_DIR / f"{stamp}-{report['meta']['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"Results written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List
+
+
+@dataclass
+class Scenario:
+    """One endpoint under test; `payload(i)` gives the i-th distinct request body"""
+    name: str
+    path: str
+    payload: Callable[[int], Dict[str, Any]]
+    method: str = "POST"
+
+
+def coordinates(i: int) -> str:
+    # Far enough apart that no two requests share a snapped grid cell (pollen snaps to 0.1 degrees)
+    return f"{40 + (i % 20) * 0.5:.4f},{(i // 20) * 0.5 - 5:.4f}"
+
+
+def preferences(i: int) -> Dict[str, List[str]]:
+    return {
+        "artists": [f"Artist {i}", f"Artist {i + 1}"],
+        "movies": [f"Movie {i}"],
+        "books": [f"Book {i}"],
+    }
+
+
+def tomorrow() -> str:
+    return (date.today() + timedelta(days=1)).isoformat()
+
+
+SCENARIOS = [
+    Scenario("qloo_recommendations", "/qloo/recommendations",
+             lambda i: {"user_preferences": preferences(i), "limit": 5}),
+    Scenario("google_venues", "/google-maps/venues",
+             lambda i: {"coordinates": coordinates(i)}),
+    Scenario("google_routes", "/google-maps/routes",
+             lambda i: {"start_address": f"Start {i}", "end_address": f"End {i}", "travel_mode": "WALK"}),
+    Scenario("google_route_matrix", "/google-maps/route-matrix",
+             lambda i: {"origins": [f"Stop {i}-{n}" for n in range(5)],
+                        "destinations": [f"Stop {i}-{n}" for n in range(5)],
+                        "travel_mode": "WALK"}),
+    Scenario("google_geocode", "/google-maps/geocode-route",
+             lambda i: {"address": f"{i} Bench Street, Munich"}),
+    Scenario("google_geocode_batch", "/google-maps/geocode-batch",
+             lambda i: {"addresses": [f"{i * 10 + n} Bench Street, Munich" for n in range(10)]}),
+    Scenario("google_weather", "/google-maps/weather-route",
+             lambda i: {"coordinates": coordinates(i), "days_ahead": 1}),
+    Scenario("google_air_quality", "/google-maps/air-quality",
+             lambda i: {"coordinates": coordinates(i), "start_hour": "09:00", "end_hour": "13:00",
+                        "target_date": tomorrow()}),
+    Scenario("google_pollen", "/google-maps/pollen-forecast",
+             lambda i: {"coordinates": coordinates(i), "target_date": tomorrow()}),
+    Scenario("claude_generate_options", "/claude/generate-options",
+             lambda i: {"user_preferences": preferences(i),
+                        "city": "Munich",
+                        "coordinates": coordinates(i),
+                        "start_time": "10:00",
+                        "end_time": "12:00",
+                        "date": tomorrow(),
+                        "theme": "Cultural Discovery",
+                        "existing_activities": []}),
+]
+
+__all__ = ['Scenario', 'SCENARIOS']
@@ -0,0 +1,32 @@
+import logging
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api import claude_routes
+from app.clients.redis_client import RedisCache
+from benchmarks.fake_redis import FakeRedis
+
+
+@pytest.fixture
+def client(monkeypatch):
+    cache = RedisCache(FakeRedis())
+
+    async def get_redis_cache():
+        return cache
+
+    monkeypatch.setattr(claude_routes, "get_redis_cache", get_redis_cache)
+    app = FastAPI()
+    app.include_router(claude_routes.router)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("path", ["/claude/generate-options/stream", "/claude/generate_options_today/stream"])
+def test_stream_with_missing_field_is_logged_500(client, path, caplog):
+    with caplog.at_level(logging.ERROR, logger=claude_routes.logger.name):
+        response = client.post(path, json={"city": "Munich"})
+
+    assert response.status_code == 500
+    assert "user_preferences" in response.json()["detail"]
+    assert any("Request that caused error" in record.getMessage() for record in caplog.records)
@@ -0,0 +1,58 @@
+import json
+
+from app.services.context_compactor import ContextCompactor, estimate_tokens
+
+compactor = ContextCompactor()
+
+
+def test_user_preferences_trim_longest_list_from_tail():
+    preferences = {
+        "artists": [f"Artist {index}" for index in range(40)],
+        "books": ["Dune", "Emma"],
+        "movies": [],
+    }
+
+    text = compactor._fit_user_preferences(preferences, 60)
+    fitted = json.loads(text)
+
+    assert estimate_tokens(text) <= 60
+    assert fitted["books"] == ["Dune", "Emma"]
+    assert fitted["artists"] == preferences["artists"][:len(fitted["artists"])]
+    assert "movies" not in fitted
+
+
+def test_weather_stays_valid_json():
+    weather = {
+        "success": True,
+        "location": "48.1,11.5",
+        "forecast": [{"date": f"2026-07-{day:02d}", "summary": "Sunny with a light breeze", "high": 25}
+                     for day in range(1, 11)],
+    }
+
+    text = compactor._fit_weather(weather, 50)
+    fitted = json.loads(text)
+
+    assert estimate_tokens(text) <= 50
+    assert fitted["location"] == "48.1,11.5"
+    assert fitted["forecast"][0]["date"] == "2026-07-01"
+
+
+def test_pollen_stays_valid_json():
+    pollen = {
+        "success": True,
+        "overall_level": "High",
+        "worst_pollen_type": "Grass",
+        "pollen_summary": {"grass": "High", "tree": "Low", "weed": "Moderate"},
+        "active_plants": [f"Plant {index}" for index in range(50)],
+    }
+
+    text = compactor._fit_pollen(pollen, 40)
+    fitted = json.loads(text)
+
+    assert estimate_tokens(text) <= 40
+    assert fitted["overall_level"] == "High"
+    assert fitted["active_plants"] == pollen["active_plants"][:len(fitted["active_plants"])]
+
+
+def test_unstructured_values_are_cut():
+    assert compactor._fit_weather("x" * 100, 5) == "x" * 20 + "..."
@@ -0,0 +1,86 @@
+import asyncio
+
+import httpx
+import pytest
+
+from app.clients import hedging, resilience
+from app.clients.hedging import Hedger
+from app.clients.resilience import ResilientTransport, UpstreamRegistry
+
+URL = "https://upstream.test/items"
+
+
+class FirstCallHangs(httpx.AsyncBaseTransport):
+    def __init__(self):
+        self.calls = 0
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        if self.calls == 1:
+            await asyncio.Event().wait()
+        return httpx.Response(200, content=b"{}", request=request)
+
+
+@pytest.fixture(autouse=True)
+def hedging_enabled(monkeypatch):
+    monkeypatch.setattr(hedging, "HEDGING_ENABLED", True)
+    monkeypatch.setattr(hedging, "HEDGE_MIN_DELAY", 0.01)
+
+
+def warm_hedger() -> Hedger:
+    hedger = Hedger("test")
+    hedger.latencies.extend([0.01] * hedging.HEDGE_MIN_SAMPLES)
+    hedger.budget = hedging.HEDGE_MAX_BURST
+    return hedger
+
+
+def half_open_client(registry: UpstreamRegistry) -> httpx.AsyncClient:
+    breaker = registry.get("upstream.test").breaker
+    for _ in range(resilience.BREAKER_MIN_CALLS):
+        breaker.record(True, 0.01)
+    breaker.opened_at -= resilience.BREAKER_OPEN_SECONDS
+    return httpx.AsyncClient(transport=ResilientTransport(FirstCallHangs(), registry))
+
+
+def test_hedge_wins_against_hanging_probe(monkeypatch):
+    monkeypatch.setattr(resilience, "BREAKER_HALF_OPEN_CALLS", 2)
+
+    async def scenario():
+        registry = UpstreamRegistry()
+        hedger = warm_hedger()
+        async with half_open_client(registry) as client:
+            response = await hedger.get(client, URL)
+            await asyncio.sleep(0.01)
+
+        upstream = registry.get("upstream.test")
+        assert response.status_code == 200
+        assert hedger.hedge_wins == 1
+        assert upstream.breaker.state == "closed"
+        assert upstream.limiter.in_flight == 0
+        # The cancelled primary is sampled too, with at least the hedge delay
+        assert len(hedger.latencies) == hedging.HEDGE_MIN_SAMPLES + 2
+        assert max(hedger.latencies) >= hedging.HEDGE_MIN_DELAY
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_hedged_probe_leaves_breaker_usable():
+    async def scenario():
+        registry = UpstreamRegistry()
+        hedger = warm_hedger()
+        async with half_open_client(registry) as client:
+            # The hedge finds the only probe slot taken and fails, the caller gives up on the primary
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(hedger.get(client, URL), timeout=0.1)
+            await asyncio.sleep(0.01)
+
+            upstream = registry.get("upstream.test")
+            assert hedger.hedged == 1
+            assert upstream.breaker.state == "half_open"
+            assert upstream.breaker.half_open_calls == 0
+
+            response = await client.get(URL)
+            assert response.status_code == 200
+            assert upstream.breaker.state == "closed"
+
+    asyncio.run(scenario())
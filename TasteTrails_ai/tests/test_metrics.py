@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+import pytest
+from prometheus_client import REGISTRY
+
+from app.clients import resilience
+from app.clients.http_client import HttpClientRegistry
+from app.clients.resilience import CircuitOpenError, UpstreamRegistry
+from app.clients.scheduler import RateScheduler
+
+HOST = "metrics.test"
+
+
+class OkTransport(httpx.AsyncBaseTransport):
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=b"{}", request=request)
+
+
+def sample(name: str, **labels) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_circuit_open_is_a_rejection_not_an_upstream_sample():
+    async def scenario():
+        registry = UpstreamRegistry()
+        breaker = registry.get(HOST).breaker
+        for _ in range(resilience.BREAKER_MIN_CALLS):
+            breaker.record(True, 0.01)
+
+        latency_count = sample("tastetrails_upstream_request_seconds_count", upstream=HOST, operation="unknown")
+        rejections = sample("tastetrails_upstream_rejections_total", upstream=HOST, reason="circuit_open")
+        clients = HttpClientRegistry(upstream_registry=registry, transport=OkTransport())
+        with pytest.raises(CircuitOpenError):
+            await clients.get(f"https://{HOST}").get(f"https://{HOST}/items")
+        await clients.close()
+
+        assert sample("tastetrails_upstream_request_seconds_count",
+                      upstream=HOST, operation="unknown") == latency_count
+        assert sample("tastetrails_upstream_rejections_total",
+                      upstream=HOST, reason="circuit_open") == rejections + 1
+
+    asyncio.run(scenario())
+
+
+def test_scheduler_wait_is_exported():
+    async def scenario():
+        scheduler = RateScheduler("queue.test", (1000, 1))
+        before = sample("tastetrails_upstream_queue_seconds_count", upstream="queue.test", priority="interactive")
+        await scheduler.acquire()
+        await scheduler.acquire()
+
+        assert sample("tastetrails_upstream_queue_seconds_count",
+                      upstream="queue.test", priority="interactive") == before + 2
+
+    asyncio.run(scenario())
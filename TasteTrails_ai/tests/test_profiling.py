@@ -0,0 +1,33 @@
+import pytest
+from fastapi import HTTPException
+
+from app.api import profiling_routes
+from app.clients import profiling
+from app.clients.profiling import ProfilingMiddleware
+
+
+def scope_with(header: bytes) -> dict:
+    return {"type": "http", "path": "/claude/test", "headers": [(b"x-profile", header)]}
+
+
+def test_profiling_header_is_ignored_without_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ADMIN_TOKEN", "")
+    middleware = ProfilingMiddleware(app=None)
+
+    assert not middleware.should_profile(scope_with(b"1"))
+
+
+def test_profiling_header_must_carry_token(monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ADMIN_TOKEN", "secret")
+    middleware = ProfilingMiddleware(app=None)
+
+    assert not middleware.should_profile(scope_with(b"1"))
+    assert middleware.should_profile(scope_with(b"secret"))
+
+
+def test_admin_endpoints_reject_everyone_without_token(monkeypatch):
+    monkeypatch.setattr(profiling_routes, "PROFILING_ADMIN_TOKEN", "")
+
+    with pytest.raises(HTTPException) as error:
+        profiling_routes.require_admin_token("")
+    assert error.value.status_code == 403
@@ -0,0 +1,54 @@
+import asyncio
+
+from app.clients import qloo_client
+from app.clients.qloo_client import QlooClient
+from app.clients.redis_client import RedisCache
+from benchmarks.fake_redis import FakeRedis
+
+
+def fake_client(monkeypatch):
+    cache = RedisCache(FakeRedis())
+
+    async def get_redis_cache():
+        return cache
+
+    monkeypatch.setattr(qloo_client, "get_redis_cache", get_redis_cache)
+    client = QlooClient()
+    client.batch_size = 5
+    client.fetches = []
+
+    async def fetch_suggestions(entity_ids, entity_type, take):
+        client.fetches.append(list(entity_ids))
+        return [{"name": f"rec-{index}"} for index in range(take)]
+
+    client._fetch_suggestions = fetch_suggestions
+    return client, cache
+
+
+def test_batch_suggestions_are_cached_under_chunk_key(monkeypatch):
+    client, cache = fake_client(monkeypatch)
+
+    async def scenario():
+        recommendations = await client.get_batch_suggestions(["c", "a", "b"], "urn:entity:artist", 2)
+        assert len(recommendations) == 6
+        assert client.fetches == [["a", "b", "c"]]
+
+        chunk_key = QlooClient.suggestion_cache_key(["a", "b", "c"], "urn:entity:artist", 2)
+        assert (await cache.get_cache(chunk_key))["recommendations"] == recommendations
+        assert await cache.get_cache(QlooClient.suggestion_cache_key(["b"], "urn:entity:artist", 2)) is None
+
+        await client.get_batch_suggestions(["a", "b", "c"], "urn:entity:artist", 2)
+        assert client.fetches == [["a", "b", "c"]]
+
+    asyncio.run(scenario())
+
+
+def test_single_entity_suggestions_are_cached_per_entity(monkeypatch):
+    client, cache = fake_client(monkeypatch)
+
+    async def scenario():
+        suggestions = await client.get_suggestion("b", "urn:entity:artist", 2)
+        assert await client.get_suggestion("b", "urn:entity:artist", 2) == suggestions
+        assert client.fetches == [["b"]]
+
+    asyncio.run(scenario())
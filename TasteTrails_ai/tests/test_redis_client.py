@@ -0,0 +1,40 @@
+import asyncio
+import time
+
+from app.clients.redis_client import LocalCache, RedisCache
+from benchmarks.fake_redis import FakeRedis
+
+
+def cache_with_l1() -> RedisCache:
+    return RedisCache(FakeRedis(), local_cache=LocalCache(default_ttl=300))
+
+
+def local_ttl(cache: RedisCache, key: str) -> float:
+    expires_at, _ = cache.local.entries[key]
+    return expires_at - time.monotonic()
+
+
+def test_l1_copy_expires_with_redis_entry():
+    async def scenario():
+        cache = cache_with_l1()
+        await cache.redis.set("test:short", cache.codec.encode({"value": 1}, prefix="test"), ex=5)
+        await cache.redis.set("test:long", cache.codec.encode({"value": 2}, prefix="test"), ex=3600)
+
+        assert await cache.get_cache("test:short") == {"value": 1}
+        assert await cache.get_many(["test:long"]) == {"test:long": {"value": 2}}
+
+        assert local_ttl(cache, "test:short") <= 5
+        assert 299 < local_ttl(cache, "test:long") <= 300
+
+    asyncio.run(scenario())
+
+
+def test_l1_skips_entries_about_to_expire():
+    async def scenario():
+        cache = cache_with_l1()
+        await cache.redis.set("test:key", cache.codec.encode({"value": 1}, prefix="test"), px=500)
+
+        assert await cache.get_many(["test:key"]) == {"test:key": {"value": 1}}
+        assert "test:key" not in cache.local.entries
+
+    asyncio.run(scenario())
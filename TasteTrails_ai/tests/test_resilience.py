@@ -0,0 +1,236 @@
+import asyncio
+import random
+
+import httpx
+import pytest
+
+from app.clients import resilience
+from app.clients.resilience import (
+    AdaptiveLimiter, CircuitBreaker, CircuitOpenError, ConcurrencyLimitExceeded, Upstream
+)
+from app.clients.scheduler import RateScheduler, ScheduledTransport, SchedulerRegistry, parse_host_settings
+
+URL = "https://upstream.test/items"
+
+
+class FakeTransport(httpx.AsyncBaseTransport):
+    """Answers with `status`, or hangs until cancelled while `hang` is set"""
+
+    def __init__(self, status: int = 200, hang: bool = False):
+        self.status = status
+        self.hang = hang
+        self.started = asyncio.Event()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.started.set()
+        if self.hang:
+            await asyncio.Event().wait()
+        return httpx.Response(self.status, content=b"{}", request=request)
+
+
+def tripped_breaker() -> CircuitBreaker:
+    breaker = CircuitBreaker(slow_call_seconds=10)
+    for _ in range(resilience.BREAKER_MIN_CALLS):
+        breaker.record(True, 0.01)
+    return breaker
+
+
+def half_open_upstream() -> Upstream:
+    upstream = Upstream("upstream.test")
+    upstream.breaker = tripped_breaker()
+    upstream.breaker.opened_at -= resilience.BREAKER_OPEN_SECONDS
+    return upstream
+
+
+def test_breaker_trips_on_failure_rate():
+    breaker = tripped_breaker()
+
+    assert breaker.state == "open"
+    assert not breaker.allow()
+    assert breaker.rejected == 1
+
+
+def test_successful_probe_closes_breaker(monkeypatch):
+    monkeypatch.setattr(resilience, "BREAKER_OPEN_SECONDS", 0)
+    breaker = tripped_breaker()
+
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record(False, 0.01)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+
+def test_failed_probe_reopens_breaker(monkeypatch):
+    monkeypatch.setattr(resilience, "BREAKER_OPEN_SECONDS", 0)
+    breaker = tripped_breaker()
+    assert breaker.allow()
+
+    breaker.record(True, 0.01)
+    assert breaker.state == "open"
+    assert breaker.trips == 2
+
+
+def test_slow_probe_reopens_breaker(monkeypatch):
+    monkeypatch.setattr(resilience, "BREAKER_OPEN_SECONDS", 0)
+    breaker = tripped_breaker()
+    assert breaker.allow()
+
+    breaker.record(False, 11)
+    assert breaker.state == "open"
+
+
+def test_probe_through_upstream_closes_breaker():
+    async def scenario():
+        upstream = half_open_upstream()
+        response = await upstream.send(httpx.Request("GET", URL), FakeTransport())
+        assert response.status_code == 200
+        assert upstream.breaker.state == "closed"
+        assert upstream.limiter.in_flight == 0
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_probe_gives_slot_back():
+    async def scenario():
+        upstream = half_open_upstream()
+        transport = FakeTransport(hang=True)
+        probe = asyncio.ensure_future(upstream.send(httpx.Request("GET", URL), transport))
+        await transport.started.wait()
+        assert upstream.breaker.state == "half_open"
+
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert upstream.breaker.half_open_calls == 0
+        assert upstream.limiter.in_flight == 0
+        response = await upstream.send(httpx.Request("GET", URL), FakeTransport())
+        assert response.status_code == 200
+        assert upstream.breaker.state == "closed"
+
+    asyncio.run(scenario())
+
+
+def test_probe_without_limiter_slot_gives_slot_back(monkeypatch):
+    monkeypatch.setattr(resilience, "LIMIT_QUEUE_TIMEOUT", 0.01)
+
+    async def scenario():
+        upstream = half_open_upstream()
+        upstream.limiter.in_flight = int(upstream.limiter.limit)
+
+        with pytest.raises(ConcurrencyLimitExceeded):
+            await upstream.send(httpx.Request("GET", URL), FakeTransport())
+
+        assert upstream.breaker.state == "half_open"
+        assert upstream.breaker.half_open_calls == 0
+        assert upstream.breaker.allow()
+
+    asyncio.run(scenario())
+
+
+def rate_limited(upstream: Upstream) -> Upstream:
+    # One token per thousand seconds, already spent
+    upstream.scheduler = RateScheduler("upstream.test", (0.001, 1))
+    upstream.scheduler.bucket.take()
+    return upstream
+
+
+def test_probe_cancelled_in_rate_queue_gives_slot_back():
+    async def scenario():
+        upstream = rate_limited(half_open_upstream())
+        probe = asyncio.ensure_future(upstream.send(httpx.Request("GET", URL), FakeTransport()))
+        await asyncio.sleep(0.01)
+        assert upstream.scheduler.queue
+
+        probe.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await probe
+
+        assert upstream.breaker.half_open_calls == 0
+        assert upstream.breaker.allow()
+
+    asyncio.run(scenario())
+
+
+
+def test_call_queued_for_rate_token_holds_no_probe_slot():
+    async def scenario():
+        upstream = rate_limited(half_open_upstream())
+        queued = asyncio.ensure_future(upstream.send(httpx.Request("GET", URL), FakeTransport()))
+        await asyncio.sleep(0.01)
+
+        assert upstream.breaker.half_open_calls == 0
+        assert upstream.breaker.allow()
+        queued.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_open_circuit_fails_without_queueing():
+    async def scenario():
+        upstream = rate_limited(Upstream("upstream.test"))
+        upstream.breaker = tripped_breaker()
+
+        with pytest.raises(CircuitOpenError):
+            await asyncio.wait_for(upstream.send(httpx.Request("GET", URL), FakeTransport()), timeout=1)
+        assert not upstream.scheduler.queue
+        assert upstream.breaker.rejected == 1
+
+    asyncio.run(scenario())
+
+
+def test_limiter_tolerates_latency_variance():
+    # Log-normal latencies around 100ms, as the benchmark's fake upstreams produce
+    rng = random.Random(7)
+    limiter = AdaptiveLimiter(latency_tolerance=3.0)
+    for _ in range(2000):
+        limiter.in_flight = int(limiter.limit)
+        limiter.record(False, 0.1 * rng.lognormvariate(0, 0.5))
+
+    assert limiter.limit > resilience.LIMIT_INITIAL
+    assert 0.08 < limiter.baseline < 0.12
+
+
+def test_limiter_backs_off_when_upstream_slows_down():
+    rng = random.Random(7)
+    limiter = AdaptiveLimiter(latency_tolerance=3.0)
+    for _ in range(200):
+        limiter.record(False, 0.1 * rng.lognormvariate(0, 0.3))
+    before = limiter.limit
+
+    for _ in range(20):
+        limiter.record(False, 0.5 * rng.lognormvariate(0, 0.3))
+
+    assert limiter.limit < before * 0.5
+
+
+def test_limiter_backs_off_on_failures():
+    limiter = AdaptiveLimiter()
+    for _ in range(10):
+        limiter.record(True, 0.01)
+
+    assert limiter.limit == pytest.approx(resilience.LIMIT_INITIAL * resilience.LIMIT_BACKOFF ** 10)
+
+
+def test_host_settings_accept_fractions():
+    settings = parse_host_settings("maps.googleapis.com=2.5, api.anthropic.com=60,invalid")
+
+    assert settings == {"maps.googleapis.com": 2.5, "api.anthropic.com": 60.0}
+
+
+def test_scheduled_transport_rate_limits_without_resilience():
+    async def scenario():
+        registry = SchedulerRegistry()
+        registry.schedulers["upstream.test"] = RateScheduler("upstream.test", (0.001, 1))
+        transport = ScheduledTransport(FakeTransport(), registry)
+
+        response = await transport.handle_async_request(httpx.Request("GET", URL))
+        assert response.status_code == 200
+        # The only token is spent, the next call waits in the queue
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(transport.handle_async_request(httpx.Request("GET", URL)), timeout=0.05)
+
+    asyncio.run(scenario())